@@ -0,0 +1,302 @@
+"""
+Headless rendering of privacy region figures described by a scenario file.
+
+A scenario is a JSON file of the form::
+
+    {
+        "grid_res": 600,
+        "figsize": [7, 7],
+        "dpi": 100,
+        "show_line": true,
+        "figures": [
+            {
+                "output": "dp_eps_{eps}.png",
+                "title": "Differential privacy",
+                "regions": [
+                    {"region": "DPRegion", "params": {"eps": [0.1, 0.5, 1.0], "delta": 0.1}},
+                    {"region": "DPExactCompositionRegion", "params": {"eps": 0.1, "delta": 0.01, "k": 10},
+                     "label": "Exact composition"}
+                ]
+            }
+        ]
+    }
+
+Regions are named after the adapter classes of ``adapters.py``, and their parameters are given as actual values, not
+as the (possibly logarithmic) slider values of the privacy window. Missing parameters take their default value.
+A figure with list-valued parameters is expanded into one figure per combination of values, whose output path is
+formatted with the parameter names, along with ``{index}``, the index of the combination. The swept parameter names
+must therefore be unique within a figure, ``index`` is reserved, and the expanded output paths must all differ.
+The grid settings may be overridden per figure, and the output format follows the extension of the output path.
+
+Every distinct region is rasterized once, in a process pool, and its mask is shared by all the figures showing it.
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Type
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import adapters
+from adapters import AdaptedRegionComputer, compute_region
+from region_cache import RegionMaskCache
+from region_figures import MultiRegionFigure, mask_cache_key, rasterize_region
+from region_masks import PackedMask
+
+_DEFAULT_GRID_RES = 600
+_DEFAULT_FIGSIZE = (7, 7)
+_DEFAULT_DPI = 100
+_DEFAULT_SHOW_LINE = True
+
+# (adapter name, sorted parameter values)
+RegionSpec = Tuple[str, Tuple[Tuple[str, Any], ...]]
+# (region spec, start, stop, grid resolution, show line)
+MaskJob = Tuple[RegionSpec, float, float, int, bool]
+
+
+def adapter_from_name(name: str) -> Type[AdaptedRegionComputer]:
+    """
+    Find an adapter of adapters.py from its class name or its adder label.
+
+    :param name: str
+
+    :return: Type[AdaptedRegionComputer]
+    """
+    cls = getattr(adapters, name, None)
+    if isinstance(cls, type) and issubclass(cls, AdaptedRegionComputer) and cls is not AdaptedRegionComputer:
+        return cls
+
+    for cls in vars(adapters).values():
+        if isinstance(cls, type) and issubclass(cls, AdaptedRegionComputer) and cls is not AdaptedRegionComputer \
+                and cls.adder_label() == name:
+            return cls
+
+    raise ValueError(f"Unknown region: {name}")
+
+
+def region_spec(name: str, params: Dict[str, Any]) -> RegionSpec:
+    """
+    Validate the parameters of a region, completing them with their default values.
+
+    :param name: str
+            Adapter class name or adder label.
+
+    :param params: Dict[str, Any]
+            Actual (not slider) parameter values.
+
+    :return: RegionSpec
+    """
+    cls = adapter_from_name(name)
+    unknown = set(params) - set(cls.params())
+    if unknown:
+        raise ValueError(f"Unknown parameters for {cls.__name__}: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for param in cls.params():
+        if param in params:
+            value = params[param]
+        else:
+            value = cls.params_to_default_vals()[param]
+            if cls.params_are_logscale()[param]:
+                value = 10 ** value
+
+        values[param] = int(value) if cls.params_are_integers()[param] else float(value)
+
+    return cls.__name__, tuple(sorted(values.items()))
+
+
+def region_label(spec: RegionSpec) -> str:
+    name, params = spec
+    cls = adapter_from_name(name)
+    if not params:
+        return cls.region_graph_name()
+
+    def _param_label(param: str, value):
+        if cls.params_are_integers()[param]:
+            return f'{cls.params_to_graph_labels()[param]}: {int(value)}'
+        return f'{cls.params_to_graph_labels()[param]}: {value:.2f}'
+
+    values = dict(params)
+    return f"{cls.region_graph_name()} ({', '.join(_param_label(param, values[param]) for param in cls.params())})"
+
+
+def compute_mask(job: MaskJob) -> PackedMask:
+    """
+    Compute and rasterize a region. Run in the worker processes.
+
+    :param job: MaskJob
+
+    :return: PackedMask
+    """
+    (name, params), start, stop, grid_res, show_line = job
+    region = compute_region(adapter_from_name(name), **dict(params))
+    return rasterize_region(region, start, stop, grid_res, show_line)
+
+
+class FigureJob:
+    """
+    A single figure to render, along with the masks of its regions once they are computed.
+    """
+
+    def __init__(self,
+        output: str,
+        title: str,
+        regions: List[Tuple[RegionSpec, str]],
+        grid_res: int,
+        figsize: Tuple[float, float],
+        dpi: int,
+        show_line: bool
+    ):
+        self.output = output
+        self.title = title
+        self.regions = regions
+        self.grid_res = grid_res
+        self.figsize = figsize
+        self.dpi = dpi
+        self.show_line = show_line
+        self.masks: Dict[Hashable, PackedMask] = {}
+
+    def mask_jobs(self) -> List[MaskJob]:
+        return [(spec, 0, 1, self.grid_res, self.show_line) for spec, _ in self.regions]
+
+
+def render_figure(job: FigureJob) -> str:
+    """
+    Render a figure from its precomputed masks. Run in the worker processes.
+
+    :param job: FigureJob
+
+    :return: str
+            Path of the rendered figure.
+    """
+    # The cache must hold every mask of the figure, which is never rasterized again
+    cache = RegionMaskCache(max(1, sum(mask.nbytes for mask in job.masks.values())))
+    for key, mask in job.masks.items():
+        cache.put(key, mask)
+
+    fig = MultiRegionFigure(grid_res=job.grid_res, figsize=job.figsize, dpi=job.dpi, show_line=job.show_line,
+                            mask_cache=cache)
+    for spec, label in job.regions:
+        # The mask is cached, so the constraints of the region are never evaluated
+        fig.add_region((), label, key=spec)
+
+    fig.draw_figure(job.title)
+    directory = os.path.dirname(job.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.save_figure(job.output)
+    fig.close_figure()
+
+    return job.output
+
+
+def expand_figures(scenario: Dict[str, Any], output_dir: str) -> List[FigureJob]:
+    """
+    Expand the figures of a scenario over the combinations of their list-valued parameters.
+
+    :param scenario: Dict[str, Any]
+            Parsed scenario file.
+
+    :param output_dir: str
+            Directory relative output paths are resolved against.
+
+    :return: List[FigureJob]
+    """
+    jobs = []
+    templates = {}
+    for figure in scenario["figures"]:
+        settings = {setting: figure.get(setting, scenario.get(setting, default)) for setting, default in [
+            ("grid_res", _DEFAULT_GRID_RES),
+            ("figsize", _DEFAULT_FIGSIZE),
+            ("dpi", _DEFAULT_DPI),
+            ("show_line", _DEFAULT_SHOW_LINE)
+        ]}
+
+        swept = [(i, param, values) for i, region in enumerate(figure["regions"])
+                 for param, values in region.get("params", {}).items() if isinstance(values, list)]
+        swept_names = [param for _, param, _ in swept]
+        if len(set(swept_names)) < len(swept_names) or "index" in swept_names:
+            raise ValueError(f"Swept parameters of {figure['output']} must have unique names other than index: "
+                             f"{', '.join(swept_names)}")
+
+        for index, combination in enumerate(itertools.product(*[values for _, _, values in swept])):
+            params = [dict(region.get("params", {})) for region in figure["regions"]]
+            for (i, param, _), value in zip(swept, combination):
+                params[i][param] = value
+
+            regions = []
+            for region, region_params in zip(figure["regions"], params):
+                spec = region_spec(region["region"], region_params)
+                regions.append((spec, region.get("label", region_label(spec))))
+
+            fields = {param: value for (_, param, _), value in zip(swept, combination)}
+            output = os.path.join(output_dir, figure["output"].format(index=index, **fields))
+            if output in templates:
+                raise ValueError(f"Output path {output} of {figure['output']} is also produced by "
+                                 f"{templates[output]}, use the swept parameters or {{index}} to tell them apart")
+            templates[output] = figure["output"]
+            jobs.append(FigureJob(output,
+                                  figure.get("title", ""),
+                                  regions,
+                                  int(settings["grid_res"]),
+                                  tuple(settings["figsize"]),
+                                  int(settings["dpi"]),
+                                  bool(settings["show_line"])))
+
+    return jobs
+
+
+def render_scenario(scenario: Dict[str, Any], output_dir: str, workers: Optional[int] = None) -> List[str]:
+    """
+    Render all the figures of a scenario. Every distinct region is computed once, then the figures are rendered from
+    the shared masks.
+
+    :param scenario: Dict[str, Any]
+            Parsed scenario file.
+
+    :param output_dir: str
+            Directory relative output paths are resolved against.
+
+    :param workers: Optional[int]
+            Number of worker processes, defaults to the number of CPUs.
+
+    :return: List[str]
+            Paths of the rendered figures.
+    """
+    figures = expand_figures(scenario, output_dir)
+    mask_jobs = list(dict.fromkeys(job for figure in figures for job in figure.mask_jobs()))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        masks = dict(zip(mask_jobs, executor.map(compute_mask, mask_jobs)))
+
+        for figure in figures:
+            for spec, start, stop, grid_res, show_line in figure.mask_jobs():
+                figure.masks[mask_cache_key(spec, start, stop, grid_res, show_line)] = \
+                    masks[(spec, start, stop, grid_res, show_line)]
+
+        return list(executor.map(render_figure, figures))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Render privacy region figures without a display.")
+    parser.add_argument("scenario", help="JSON scenario file listing the figures and their regions")
+    parser.add_argument("-o", "--output-dir",
+                        help="directory relative output paths are resolved against, "
+                             "defaults to the directory of the scenario file")
+    parser.add_argument("-j", "--workers", type=int, help="number of worker processes, defaults to the number of CPUs")
+    args = parser.parse_args(argv)
+
+    with open(args.scenario, encoding="utf-8") as scenario_file:
+        scenario = json.load(scenario_file)
+
+    output_dir = args.output_dir if args.output_dir is not None else os.path.dirname(os.path.abspath(args.scenario))
+    for path in render_scenario(scenario, output_dir, args.workers):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 
 from definitions import SLIDER_RESOLUTION_INTEGER, SLIDER_RESOLUTION_NON_INTEGER
 from region_figures import MultiRegionFigure
+from render_scheduler import RenderScheduler
+from region_worker import RegionWorker
 from adapters import *
 
 _WINDOW_SIZE = "1300x900"
@@ -28,13 +30,18 @@ _REGION_VALUES = [
     DPBasicCompositionRegion,
     DPExactCompositionRegion,
     DPSimplifiedCompositionRegion,
+    DPHeterogeneousCompositionRegion,
     DPTVRegion,
     DPTVCompositionRegion,
     GaussianDPRegion,
     GaussianDPCompositionRegion,
     LaplaceMechanismRegion,
     GaussianMechanismRegion,
-    RandomizedResponseRegion
+    RandomizedResponseRegion,
+    LaplacePLDCompositionRegion,
+    RandomizedResponsePLDCompositionRegion,
+    LaplaceRDPCompositionRegion,
+    RandomizedResponseRDPCompositionRegion
 ]
 
 _ADDER_COMBOB_HEIGHT = len(_REGION_VALUES) + 1
@@ -84,6 +91,8 @@ class PrivacyWindow:
         self._curr_reg_id = None
         self._region_counter = 0
         self._curr_reg_num = 0
+        self._render_scheduler = RenderScheduler(self._window, self._render_slider_values, refine=self.update_region)
+        self._region_worker = RegionWorker(self._window)
 
         self.plot_privacy()
         self.build_selection_dropdown()
@@ -108,47 +117,80 @@ class PrivacyWindow:
         privacy_toolbar_frame.grid(column=0, row=3)
         self._privacy_canvas.get_tk_widget().grid(column=0, row=0, rowspan=3)
 
-    def replot_privacy(self):
+    def replot_privacy(self, preview=False):
 
         prioritized_reg = -1 if ((self._curr_selector_label in _INITIAL_SELECTOR_VALUES)
                                  or not self._toggle_reordering.get())\
             else self._curr_reg_id
 
-        self._privacy_fig.clear_figure()
         self._privacy_fig.draw_figure(_PRIVACY_PLOT_TITLE,
                                       prioritize_region=prioritized_reg,
-                                      show_legend=self._show_legend.get()
+                                      show_legend=self._show_legend.get(),
+                                      preview=preview
                                       )
         self._privacy_canvas.draw()
         self._privacy_canvas.flush_events()
         
     def add_region(self):
+        region, label, key = PrivacyWindow._compute_region(self._curr_reg_cls, self._curr_param_vals, self._curr_reg_num)
+        self._curr_reg_id = self._privacy_fig.add_region(region, label, key=key)
+
+        self.replot_privacy()
+
+    def update_region(self):
+        reg_id = self._curr_reg_id
+        reg_cls = self._curr_reg_cls
+        param_vals = copy(self._curr_param_vals)
+        reg_num = self._curr_reg_num
+        preview = self._render_scheduler.previewing()
+
+        def job():
+            region, label, key = PrivacyWindow._compute_region(reg_cls, param_vals, reg_num)
+            self._privacy_fig.prepare_region(region, key, preview)
+            return region, label, key
+
+        def on_done(result):
+            if self._privacy_fig.has_region(reg_id):
+                region, label, key = result
+                self._privacy_fig.update_region(reg_id, region, label, key=key)
+                self.replot_privacy(preview)
+
+        self._region_worker.submit(reg_id, job, on_done)
+
+    @staticmethod
+    def _compute_region(reg_cls: Type[AdaptedRegionComputer], param_vals: Dict[str, float], reg_num: int):
         def _graph_label() -> str:
             def _param_label(param: str):
-                if self._curr_reg_cls.params_are_integers()[param]:
-                    return f'{self._curr_reg_cls.params_to_graph_labels()[param]}: {int(construct_args[param])}'
-                return f'{self._curr_reg_cls.params_to_graph_labels()[param]}: {construct_args[param]:.2f}'
+                if reg_cls.params_are_integers()[param]:
+                    return f'{reg_cls.params_to_graph_labels()[param]}: {int(construct_args[param])}'
+                return f'{reg_cls.params_to_graph_labels()[param]}: {construct_args[param]:.2f}'
 
-            if not self._curr_reg_cls.params():
-                return f"{self._curr_reg_cls.region_graph_name()} [#{self._curr_reg_num}]"
+            if not reg_cls.params():
+                return f"{reg_cls.region_graph_name()} [#{reg_num}]"
 
-            return f"{self._curr_reg_cls.region_graph_name()} ({", ".join(
-                [_param_label(param) for param in self._curr_reg_cls.params()])}) [#{self._curr_reg_num}]"
+            return f"{reg_cls.region_graph_name()} ({", ".join(
+                [_param_label(param) for param in reg_cls.params()])}) [#{reg_num}]"
 
-        construct_args = PrivacyWindow._construct_kwargs_from_params(self._curr_param_vals, self._curr_reg_cls)
-        self._curr_reg_id = self._privacy_fig.add_region(
-            self._curr_reg_cls.region_computation(**construct_args),
-            _graph_label()
+        construct_args = PrivacyWindow._construct_kwargs_from_params(param_vals, reg_cls)
+        return (
+            compute_region(reg_cls, **construct_args),
+            _graph_label(),
+            (reg_cls, tuple(sorted(construct_args.items())))
         )
 
-        self.replot_privacy()
+    def _render_slider_values(self, param_vals: Dict[str, float]):
+        self._curr_param_vals.update(param_vals)
+        self.update_region()
+        self.update_curr_reg()
 
     def hide_region(self, region_id: int):
+        self._region_worker.discard(region_id)
         self._privacy_fig.remove_region(region_id)
 
     def build_selection_dropdown(self):
 
         def onclick(event):
+            self._render_scheduler.flush()
             curr_val = self._selector_val.get()
             self._curr_selector_label = curr_val
 
@@ -255,6 +297,7 @@ class PrivacyWindow:
 
     def build_addition_dropdown(self):
         def onclick(event):
+            self._render_scheduler.flush()
             curr_val = adder_val.get()
             if curr_val != _INTERSECT_REGIONS:
                 self._curr_reg_cls = _ADDER_LABELS_TO_CLS_MAP[curr_val]
@@ -297,10 +340,7 @@ class PrivacyWindow:
 
         def slider_command(slider_param: str):
             def command(x):
-                self._curr_param_vals[slider_param] = slider_vars[slider_param].get()
-                self.hide_region(self._curr_reg_id)
-                self.add_region()
-                self.update_curr_reg()
+                self._render_scheduler.submit(slider_param, slider_vars[slider_param].get())
             return command
 
         param_list = self._curr_reg_cls.params()
@@ -325,6 +365,8 @@ class PrivacyWindow:
                              orient=tk.HORIZONTAL,
                              length=_SLIDER_LENGTH)
 
+            self._render_scheduler.bind_drag(scale)
+
             scale.grid(column=1, row=idx)
             label = tk.Label(self._slider_frame, text=labels_map[param])
             label.grid(column=0, row=idx)
@@ -332,6 +374,7 @@ class PrivacyWindow:
     def build_delete_buttons(self):
 
         def remove_region():
+            self._render_scheduler.cancel()
             if self._curr_reg_id is not None:
                 self.hide_region(self._curr_reg_id
                                  )
@@ -354,6 +397,7 @@ class PrivacyWindow:
                 self._selector_val.set("No region selected")
 
         def remove_everything():
+            self._region_worker.shutdown()
             self._window.destroy()
             newwindow = PrivacyWindow()
 
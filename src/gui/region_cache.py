@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from region_masks import PackedMask
+
+_DEFAULT_MAX_BYTES = 64 * 2 ** 20
+
+
+class RegionMaskCache:
+    """
+    Least recently used cache of rasterized region masks, bounded by the total number of bytes of the stored masks.
+    Lookups and insertions are thread-safe, so that masks can be computed off the Tk thread.
+    """
+
+    def __init__(self, max_bytes: int = _DEFAULT_MAX_BYTES):
+        """
+        Construct an empty cache.
+
+        :param max_bytes: int
+                Maximal total size of the cached masks, defaults to 64 MiB.
+        """
+        self._masks: OrderedDict[Hashable, PackedMask] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[PackedMask]:
+        """
+        Look up a mask and mark it as the most recently used one.
+
+        :param key: Hashable
+
+        :return: Optional[PackedMask]
+                Cached mask, None if absent.
+        """
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._masks.move_to_end(key)
+            return mask
+
+    def put(self, key: Hashable, mask: PackedMask):
+        """
+        Store a mask, evicting the least recently used ones until the cache fits in its byte budget.
+        Masks larger than the whole budget are not stored.
+
+        :param key: Hashable
+
+        :param mask: PackedMask
+        """
+        with self._lock:
+            if key in self._masks:
+                self._nbytes -= self._masks.pop(key).nbytes
+
+            if mask.nbytes > self._max_bytes:
+                return
+
+            self._masks[key] = mask
+            self._nbytes += mask.nbytes
+
+            while self._nbytes > self._max_bytes:
+                _, evicted = self._masks.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], PackedMask]) -> PackedMask:
+        """
+        Look up a mask, computing and storing it on a miss.
+
+        :param key: Hashable
+
+        :param compute: Callable[[], PackedMask]
+                Computes the mask if it is not cached.
+
+        :return: PackedMask
+        """
+        mask = self.get(key)
+        if mask is None:
+            mask = compute()
+            self.put(key, mask)
+
+        return mask
+
+    def clear(self):
+        with self._lock:
+            self._masks.clear()
+            self._nbytes = 0
+
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def hits(self) -> int:
+        return self._hits
+
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._masks
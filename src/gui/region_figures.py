@@ -1,17 +1,20 @@
 import copy
-import functools
 
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
 from definitions import Constraint, Region, LINE_REGION_THICKNESS, SUM_LINE
-from typing import Sequence, List, Tuple
+from tradeoff_curves import TradeOffCurve
+from typing import Sequence, List, Tuple, Hashable, Optional, Dict
 from functools import reduce
 
 from palettes import colourblind_palette
+from region_cache import RegionMaskCache
+from region_masks import PackedMask, boundary_mask
+from region_store import RegionStore, LabelledRegion
 
-_TO_REMOVE = None
+_DEFAULT_PREVIEW_RES = 128
 
 
 def draw_single_region_from_constraints(
@@ -47,9 +50,7 @@ def draw_single_region_from_constraints(
     assert len(constraints) > 0
 
     d = np.linspace(start_grid, stop_grid, num=grid_res)
-    x, y = np.meshgrid(d, d)
-    applied_constraints = [constraint(x,y) for constraint in constraints]
-    plt.imshow((reduce(lambda c1, c2: c1 & c2, applied_constraints)).astype(int),
+    plt.imshow(apply_constraints(constraints, d, d).astype(int),
                extent=(start_grid, stop_grid, start_grid, stop_grid), origin="lower", cmap=cmap, alpha=alpha)
     plt.xlim(start_grid, stop_grid)
     plt.ylim(start_grid, stop_grid)
@@ -59,59 +60,293 @@ def draw_single_region_from_constraints(
     plt.show()
 
 
+def apply_constraints(constraints: Sequence[Constraint], fp: np.ndarray, fn: np.ndarray) -> np.ndarray:
+    """
+    Evaluate constraints on the open grid spanned by two axes: every constraint is given fp as a row and fn as a
+    column, so that terms depending on a single rate, such as a trade-off function f(fp), are computed once per
+    sample rather than once per grid point, and only the comparisons are broadcast over the grid.
+
+    :param constraints: Sequence[Constraint]
+            Non-empty sequence of constraints.
+
+    :param fp: np.ndarray
+            False positive rates, along the columns of the grid.
+
+    :param fn: np.ndarray
+            False negative rates, along the rows of the grid.
+
+    :return: np.ndarray
+            Boolean mask of shape (len(fn), len(fp)), true where all constraints hold.
+    """
+    assert len(constraints) > 0
+
+    fp_row, fn_col = fp[None, :], fn[:, None]
+    applied = reduce(lambda c1, c2: c1 & c2, [constraint(fp_row, fn_col) for constraint in constraints])
+    return np.broadcast_to(applied, (len(fn), len(fp)))
+
+
+def mask_cache_key(
+        key: Hashable,
+        start_grid,
+        stop_grid,
+        grid_res,
+        show_line,
+        line_thickness=LINE_REGION_THICKNESS
+) -> Hashable:
+    """
+    Key of a rasterized region in a RegionMaskCache, which depends on the grid it was rasterized on.
+
+    :param key: Hashable
+            Key of the region, typically its adapter class and parameter values.
+
+    :param start_grid: float
+
+    :param stop_grid: float
+
+    :param grid_res: int
+
+    :param show_line: bool
+
+    :param line_thickness: int
+
+    :return: Hashable
+    """
+    return key, start_grid, stop_grid, grid_res, show_line and line_thickness
+
+
+def rasterize_region(
+        region: Region,
+        start_grid=0,
+        stop_grid=1,
+        grid_res=600,
+        show_line=True,
+        line_thickness=LINE_REGION_THICKNESS
+) -> PackedMask:
+    """
+    Rasterize a region on a square grid, keeping only its boundary if show_line is set.
+    This does not touch any matplotlib object, and can therefore run on a background thread or in another process.
+
+    :param region: Region
+            Region to rasterize.
+
+    :param start_grid: float
+            Smallest grid value, defaults to 0.
+
+    :param stop_grid: float
+            Largest grid value, defaults to 1.
+
+    :param grid_res: int
+            Grid resolution, defaults to 600.
+
+    :param show_line: bool
+            Whether only the boundary of the region is kept, defaults to True.
+
+    :param line_thickness: int
+            Thickness of the boundary in pixels, defaults to LINE_REGION_THICKNESS.
+
+    :return: PackedMask
+            Mask of the region, along with its area.
+    """
+    d = np.linspace(start_grid, stop_grid, num=grid_res)
+    if isinstance(region, TradeOffCurve):
+        # Evaluate the curve once per false positive rate
+        whole_reg = d[:, None] >= region(d)[None, :]
+        if not show_line:
+            whole_reg &= SUM_LINE(d[None, :], d[:, None])
+        area = region.area()
+    else:
+        whole_reg = apply_constraints([constraint for constraint in region
+                                       if constraint is not SUM_LINE or not show_line], d, d)
+        inside = whole_reg & SUM_LINE(d[None, :], d[:, None]) if show_line else whole_reg
+        area = np.count_nonzero(inside) * ((stop_grid - start_grid) / grid_res) ** 2
+
+    if not show_line:
+        return PackedMask(whole_reg, area)
+
+    return PackedMask(boundary_mask(whole_reg, line_thickness), area)
+
+
 class MultiRegionFigure:
     def __init__(self,
         start_grid=0,
         stop_grid=1,
         grid_res=600,
+        preview_res=_DEFAULT_PREVIEW_RES,
         palette=None,
         figsize=(6, 6),
         dpi=100,
-        show_line=True
+        show_line=True,
+        mask_cache: Optional[RegionMaskCache] = None
     ):
         self._fig = plt.figure(figsize=figsize, dpi=dpi)
         self._plot = self._fig.add_subplot()
-        d = np.linspace(start_grid, stop_grid, num=grid_res)
-        self._labelled_regions: List[Tuple[Sequence[Constraint], str]] = []
-        self._x, self._y = np.meshgrid(d, d)
+        self._image = None
+        self._labelled_regions = RegionStore()
         self._start = start_grid
         self._stop = stop_grid
-        self._region_id = -1
+        self._grid_res = grid_res
+        self._preview_res = min(preview_res, grid_res)
         self._show_line = show_line
 
         if palette is None:
             palette = copy.deepcopy(colourblind_palette())
 
         self._palette = np.array(palette)
+        self._mask_cache = RegionMaskCache() if mask_cache is None else mask_cache
+        # Curves drawn over the regions, e.g. empirical trade-off curves: the line of each, then its band, if any
+        self._curves: Dict[int, List[plt.Line2D]] = {}
+        self._next_curve = 0
+
+    def add_region(self, constraints: Sequence[Constraint], label: str, key: Optional[Hashable] = None) -> int:
+        """
+        Add a region to the figure.
 
-    def add_region(self, constraints: Sequence[Constraint], label: str) -> int:
-        double = (constraints, label)
-        self._labelled_regions.append(double)
-        self._region_id += 1
-        return self._region_id
+        :param constraints: Sequence[Constraint]
+                Region to draw.
+
+        :param label: str
+                Legend label of the region.
+
+        :param key: Optional[Hashable]
+                Identifies the region (typically its adapter class and parameter values) so that its rasterized mask
+                can be cached across redraws. Regions without a key are recomputed on every draw.
+
+        :return: int
+                Stable identifier of the region in the figure.
+        """
+        return self._labelled_regions.add(constraints, label, key)
+
+    def update_region(self,
+        region_id: int,
+        constraints: Sequence[Constraint],
+        label: Optional[str] = None,
+        key: Optional[Hashable] = None
+    ):
+        """
+        Replace a region of the figure in place, keeping its identifier.
+
+        :param region_id: int
+
+        :param constraints: Sequence[Constraint]
+
+        :param label: Optional[str]
+                New legend label, defaults to keeping the current one.
+
+        :param key: Optional[Hashable]
+                Cache key of the new region, if any.
+        """
+        self._labelled_regions.update(region_id, constraints, label, key)
 
     def remove_region(self, region_id: int):
-        self._labelled_regions[region_id] = _TO_REMOVE
+        self._labelled_regions.remove(region_id)
+
+    def has_region(self, region_id: int) -> bool:
+        return region_id in self._labelled_regions
+
+    def add_curve(self,
+        curve: TradeOffCurve,
+        label: str,
+        band: Optional[Tuple[TradeOffCurve, TradeOffCurve]] = None
+    ) -> int:
+        """
+        Overlay a trade-off curve on the regions, e.g. the empirical curve of an audit next to the analytic region.
+
+        :param curve: TradeOffCurve
+
+        :param label: str
+                Legend label of the curve.
+
+        :param band: Optional[Tuple[TradeOffCurve, TradeOffCurve]]
+                Lower and upper bounds of the curve, drawn dashed in its colour, defaults to none.
+
+        :return: int
+                Stable identifier of the curve in the figure.
+        """
+        line, = self._plot.plot(*curve.breakpoints(), label=label, zorder=3)
+        lines = [line]
+        if band is not None:
+            for bound in band:
+                lines += self._plot.plot(*bound.breakpoints(), color=line.get_color(), linestyle="--",
+                                         linewidth=line.get_linewidth() / 2, zorder=3)
+
+        curve_id = self._next_curve
+        self._next_curve += 1
+        self._curves[curve_id] = lines
+        return curve_id
+
+    def remove_curve(self, curve_id: int):
+        for line in self._curves.pop(curve_id):
+            line.remove()
+
+    def prepare_region(self, constraints: Sequence[Constraint], key: Hashable, preview=False):
+        """
+        Rasterize a region into the mask cache without adding it to the figure. This does not touch any matplotlib
+        object, and can therefore run on a background thread.
+
+        :param constraints: Sequence[Constraint]
+
+        :param key: Hashable
+                Key under which the region will be added to the figure.
+
+        :param preview: bool
+                Whether the region is rasterized for a preview, defaults to False.
+        """
+        self._cached_region(constraints, key, preview)
 
     def finish_figure(self, title=""):
         self.draw_figure(title=title)
 
-    def draw_figure(self, title="", prioritize_region=-1, show_legend=True):
-        shown_regions = [(reg[0], reg[1], idx) for idx, reg in enumerate(self._labelled_regions) if reg is not _TO_REMOVE]
+    def draw_figure(self, title="", prioritize_region=-1, show_legend=True, preview=False):
+        """
+        Draw the regions of the figure. The axes need not be cleared beforehand: redrawing only replaces the image of
+        the regions and the legend, which spares matplotlib from rebuilding the axes.
+
+        :param title: str
+                Title of the figure, defaults to "".
+
+        :param prioritize_region: int
+                Identifier of the region drawn on top of the others, defaults to -1 (none).
+
+        :param show_legend: bool
+                Whether the legend is shown, defaults to True.
+
+        :param preview: bool
+                Whether the regions are rasterized on the coarse preview grid, e.g. while a slider is dragged,
+                defaults to False.
+        """
+        shown_regions = [(reg, idx) for idx, reg in self._labelled_regions.items()]
         labels = []
 
-        for idx, labelled_computed_region in enumerate(self._compute_and_sort_regions(shown_regions, prioritize_region)):
+        grid_res, _ = self._resolution(preview)
+        image = np.zeros((grid_res, grid_res, 4), dtype=np.uint8)
+
+        sorted_regions = self._compute_and_sort_regions(shown_regions, prioritize_region, preview)
+        for idx, labelled_computed_region in enumerate(sorted_regions):
             k = (idx + 1) % len(self._palette)
             computed_region, label = labelled_computed_region
-            self._plot.imshow(self._palette[k * computed_region],
-                       extent=(self._start, self._stop, self._start, self._stop),
-                       origin="lower")
+            image[computed_region.unpack()] = self._palette[k]
             labels.append(label)
 
+        if not labels:
+            if self._image is not None:
+                self._image.remove()
+                self._image = None
+        elif self._image is None:
+            self._image = self._plot.imshow(image, extent=(self._start, self._stop, self._start, self._stop),
+                                            origin="lower")
+        else:
+            self._image.set_data(image)
+
+        if self._image is not None:
+            # Previews are upscaled as is, rather than resampled with antialiasing
+            self._image.set_interpolation("nearest" if preview else "antialiased")
+
         if show_legend:
             patches = [mpatches.Patch(color=self._palette[(i+1) % len(self._palette)]/255., label=lab)
                        for i, lab in enumerate(labels)]
-            self._plot.legend(handles=patches)
+            self._plot.legend(handles=patches + [lines[0] for lines in self._curves.values()])
+        elif self._plot.get_legend() is not None:
+            self._plot.get_legend().remove()
         self._plot.set(xlim=(self._start, self._stop), ylim=(self._start, self._stop))
         self._plot.set_title(title)
         self._plot.set(xlabel="False negative probability", ylabel="False positive probability")
@@ -124,54 +359,66 @@ class MultiRegionFigure:
 
     def clear_figure(self):
         self._plot.clear()
+        self._image = None
+        self._curves.clear()
 
     def reset_figure(self):
         self._labelled_regions.clear()
-        self._region_id = -1
         self.clear_figure()
 
     def save_figure(self, path):
         self._fig.savefig(fname=path)
 
-    def _compute_region(self, region: Region):
-        applied_constraints = [constraint(self._x, self._y) for constraint in region
-                               if constraint is not SUM_LINE or not self._show_line]
-        whole_reg = reduce(lambda c1, c2: c1 & c2, applied_constraints).astype(int)
+    def close_figure(self):
+        plt.close(self._fig)
 
-        if not self._show_line:
-            return whole_reg
+    def get_mask_cache(self) -> RegionMaskCache:
+        return self._mask_cache
 
-        row_csum = np.cumsum(whole_reg, axis=1)
-        line_reg = (row_csum <= LINE_REGION_THICKNESS).astype(whole_reg.dtype) * whole_reg
+    def region_area(self, region_id: int) -> float:
+        """
+        Area of a region of the figure, exact for regions defined by a trade-off curve and otherwise estimated from
+        its rasterization. Computed once per region and cached along with its mask.
 
-        col_csum = np.cumsum(whole_reg, axis=0)
-        col_reg = (col_csum <= LINE_REGION_THICKNESS).astype(whole_reg.dtype) * whole_reg
+        :param region_id: int
 
-        return np.bitwise_or(line_reg, col_reg)
+        :return: float
+        """
+        region, _, key = self._labelled_regions.get(region_id)
+        return self._cached_region(region, key).area
 
-    def _compute_and_sort_regions(self, labelled_regions: List[Tuple[Sequence[Constraint], str, int]], prioritize_region) \
-            -> List[Tuple[np.ndarray, str]]:
-        computed_labelled_regions = [
-            (self._compute_region(reg), label, idx) for (reg, label, idx) in labelled_regions
-        ]
+    def _resolution(self, preview: bool) -> Tuple[int, int]:
+        """
+        :param preview: bool
 
-        computed_labelled_regions.sort(key=functools.cmp_to_key(MultiRegionFigure._region_comparator(prioritize_region)),
-                                       reverse=True)
+        :return: Tuple[int, int]
+                Grid resolution, and thickness of the region boundaries scaled to keep their width on the figure.
+        """
+        if not preview:
+            return self._grid_res, LINE_REGION_THICKNESS
 
-        return [(reg, label) for (reg, label, idx) in computed_labelled_regions]
+        return self._preview_res, max(1, round(LINE_REGION_THICKNESS * self._preview_res / self._grid_res))
 
-    @staticmethod
-    def _region_comparator(prioritize_region: int):
+    def _cached_region(self, region: Region, key: Optional[Hashable], preview=False) -> PackedMask:
+        grid_res, thickness = self._resolution(preview)
+        compute = lambda: rasterize_region(region, self._start, self._stop, grid_res, self._show_line, thickness)
+        if key is None:
+            return compute()
 
-        def inner(region1: Tuple[np.ndarray, str, int], region2: Tuple[np.ndarray, str, int]):
-            reg1, _, index1 = region1
-            reg2, _, index2 = region2
+        grid_key = mask_cache_key(key, self._start, self._stop, grid_res, self._show_line, thickness)
+        return self._mask_cache.get_or_compute(grid_key, compute)
 
-            if index1 == prioritize_region:
-                return -1
-            elif index2 == prioritize_region:
-                return 1
+    def _compute_and_sort_regions(
+            self,
+            labelled_regions: List[Tuple[LabelledRegion, int]],
+            prioritize_region,
+            preview=False
+    ) -> List[Tuple[PackedMask, str]]:
+        computed_labelled_regions = [
+            (self._cached_region(reg, key, preview), label, idx) for ((reg, label, key), idx) in labelled_regions
+        ]
 
-            return (reg1 - reg2).sum()
+        # Larger regions are drawn first, the prioritized region last
+        computed_labelled_regions.sort(key=lambda labelled: (labelled[2] == prioritize_region, -labelled[0].area))
 
-        return inner
+        return [(reg, label) for (reg, label, idx) in computed_labelled_regions]
@@ -0,0 +1,65 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class PackedMask:
+    """
+    Boolean region mask stored as bit-planes, packed along its rows (8 pixels per byte), along with the area of the
+    region it depicts.
+    """
+
+    def __init__(self, mask: np.ndarray, area: float):
+        """
+        Pack a boolean mask.
+
+        :param mask: np.ndarray
+                Two-dimensional boolean mask.
+
+        :param area: float
+                Area of the depicted region, which may differ from the area of the mask when only its boundary is drawn.
+        """
+        assert mask.ndim == 2
+        self._shape: Tuple[int, int] = mask.shape
+        self._bits = np.packbits(mask, axis=1)
+        self._bits.setflags(write=False)
+        self._area = area
+
+    def unpack(self) -> np.ndarray:
+        """
+        :return: np.ndarray
+                Boolean mask.
+        """
+        return np.unpackbits(self._bits, axis=1, count=self._shape[1]).view(bool)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._shape
+
+    @property
+    def nbytes(self) -> int:
+        return self._bits.nbytes
+
+    @property
+    def area(self) -> float:
+        return self._area
+
+
+def boundary_mask(mask: np.ndarray, thickness: int) -> np.ndarray:
+    """
+    Keep the first pixels of a region along each row and each column, to draw its lower-left boundary as a line.
+
+    :param mask: np.ndarray
+            Boolean mask of the region.
+
+    :param thickness: int
+            Number of pixels kept along each row and each column.
+
+    :return: np.ndarray
+            Boolean mask of the boundary.
+    """
+    dtype = np.uint16 if max(mask.shape) < 2 ** 16 else np.uint32
+    line_reg = (np.cumsum(mask, axis=1, dtype=dtype) <= thickness) & mask
+    col_reg = (np.cumsum(mask, axis=0, dtype=dtype) <= thickness) & mask
+
+    return line_reg | col_reg
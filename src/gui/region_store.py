@@ -0,0 +1,77 @@
+from typing import Dict, Hashable, Iterator, Optional, Sequence, Tuple
+
+from definitions import Constraint
+
+LabelledRegion = Tuple[Sequence[Constraint], str, Optional[Hashable]]
+
+
+class RegionStore:
+    """
+    Labelled regions addressed by stable handles, iterated in insertion order.
+
+    Removed regions are dropped from the store rather than replaced by a placeholder, so that its size and the cost of
+    iterating over it only depend on the regions currently stored.
+    """
+
+    def __init__(self):
+        self._regions: Dict[int, LabelledRegion] = {}
+        self._next_handle = 0
+
+    def add(self, constraints: Sequence[Constraint], label: str, key: Optional[Hashable] = None) -> int:
+        """
+        Store a region.
+
+        :param constraints: Sequence[Constraint]
+
+        :param label: str
+
+        :param key: Optional[Hashable]
+                Cache key of the region, if any.
+
+        :return: int
+                Handle of the region, never reused by the store.
+        """
+        handle = self._next_handle
+        self._next_handle += 1
+        self._regions[handle] = (constraints, label, key)
+        return handle
+
+    def update(self,
+        handle: int,
+        constraints: Sequence[Constraint],
+        label: Optional[str] = None,
+        key: Optional[Hashable] = None
+    ):
+        """
+        Replace a stored region in place, keeping its handle and its position in the iteration order.
+
+        :param handle: int
+
+        :param constraints: Sequence[Constraint]
+
+        :param label: Optional[str]
+                New label, defaults to keeping the current one.
+
+        :param key: Optional[Hashable]
+                New cache key of the region, if any.
+        """
+        _, old_label, _ = self._regions[handle]
+        self._regions[handle] = (constraints, old_label if label is None else label, key)
+
+    def remove(self, handle: int):
+        self._regions.pop(handle, None)
+
+    def clear(self):
+        self._regions.clear()
+
+    def get(self, handle: int) -> LabelledRegion:
+        return self._regions[handle]
+
+    def items(self) -> Iterator[Tuple[int, LabelledRegion]]:
+        return iter(self._regions.items())
+
+    def __contains__(self, handle: int) -> bool:
+        return handle in self._regions
+
+    def __len__(self) -> int:
+        return len(self._regions)
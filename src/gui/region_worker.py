@@ -0,0 +1,105 @@
+import queue
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable
+
+_DEFAULT_POLL_MS = 15
+
+
+class RegionWorker:
+    """
+    Run region computations on a background thread and hand their results back to the Tk event loop.
+
+    Jobs are submitted to slots (e.g. one per region of a figure) and tagged with a generation number: submitting a new
+    job to a slot supersedes the previous one, which is cancelled if it has not started yet and whose result is
+    discarded otherwise. Results are polled from the Tk thread, so that callbacks may safely update widgets.
+    """
+
+    def __init__(self, widget: tk.Misc, poll_ms: int = _DEFAULT_POLL_MS):
+        """
+        Construct the worker.
+
+        :param widget: tk.Misc
+                Widget whose event loop receives the results.
+
+        :param poll_ms: int
+                Polling period of the results while jobs are running, in milliseconds, defaults to 15.
+        """
+        self._widget = widget
+        self._poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="region-worker")
+        self._results = queue.SimpleQueue()
+        self._generations: Dict[Hashable, int] = {}
+        self._futures: Dict[Hashable, Future] = {}
+        self._polling = False
+
+    def submit(self, slot: Hashable, job: Callable[[], Any], on_done: Callable[[Any], None]) -> int:
+        """
+        Submit a job, superseding the previous job of the same slot.
+
+        :param slot: Hashable
+                Slot of the job.
+
+        :param job: Callable[[], Any]
+                Computation run on the background thread. It must not touch any widget.
+
+        :param on_done: Callable[[Any], None]
+                Callback run on the Tk thread with the result of the job, unless it has been superseded meanwhile.
+
+        :return: int
+                Generation number of the job.
+        """
+        generation = self._generations.get(slot, 0) + 1
+        self._generations[slot] = generation
+
+        previous = self._futures.pop(slot, None)
+        if previous is not None:
+            previous.cancel()
+
+        def run():
+            if self._generations.get(slot) != generation:
+                return
+
+            try:
+                self._results.put((slot, generation, job(), None, on_done))
+            except Exception as error:
+                self._results.put((slot, generation, None, error, on_done))
+
+        self._futures[slot] = self._executor.submit(run)
+        if not self._polling:
+            self._polling = True
+            self._widget.after(self._poll_ms, self._poll)
+
+        return generation
+
+    def discard(self, slot: Hashable):
+        """
+        Discard the pending job of a slot, if any.
+
+        :param slot: Hashable
+        """
+        self._generations[slot] = self._generations.get(slot, 0) + 1
+        future = self._futures.pop(slot, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self):
+        for slot in [slot for slot, future in self._futures.items() if future.done()]:
+            self._futures.pop(slot)
+
+        # Results of finished jobs are already queued, so polling can stop once no job is left
+        if self._futures:
+            self._widget.after(self._poll_ms, self._poll)
+        else:
+            self._polling = False
+
+        while not self._results.empty():
+            slot, generation, result, error, on_done = self._results.get()
+            if self._generations.get(slot) != generation:
+                continue
+            if error is not None:
+                raise error
+            on_done(result)
@@ -0,0 +1,156 @@
+import time
+import tkinter as tk
+from typing import Any, Callable, Dict, Optional
+
+_DEFAULT_FRAME_BUDGET_MS = 40
+_DEFAULT_REFINE_DELAY_MS = 300
+
+
+class RenderScheduler:
+    """
+    Coalesce parameter updates, such as the events fired by a slider while it is dragged, and render only the latest
+    value of each parameter once the Tk event loop is idle.
+
+    Updates received while a render is pending overwrite each other, so that stale values are dropped instead of
+    queued. At most one render is started per frame budget; a render taking longer than the budget is followed by
+    an idle pass of the event loop, during which new updates are coalesced again.
+
+    Renders can be progressive: while a bound slider is dragged, renders are previews (see previewing), and a refining
+    pass follows once the slider is released or left idle.
+    """
+
+    def __init__(self,
+        widget: tk.Misc,
+        render: Callable[[Dict[str, Any]], None],
+        frame_budget_ms: int = _DEFAULT_FRAME_BUDGET_MS,
+        refine: Optional[Callable[[], None]] = None,
+        refine_delay_ms: int = _DEFAULT_REFINE_DELAY_MS
+    ):
+        """
+        Construct the scheduler.
+
+        :param widget: tk.Misc
+                Widget whose event loop runs the renders.
+
+        :param render: Callable[[Dict[str, Any]], None]
+                Render callback, given the latest value of every parameter updated since the previous render.
+
+        :param frame_budget_ms: int
+                Minimal time between the starts of two renders, in milliseconds, defaults to 40.
+
+        :param refine: Optional[Callable[[], None]]
+                Full-quality render of the current state, run after previews. Renders are never previews if None.
+
+        :param refine_delay_ms: int
+                Time after the last preview after which refine runs even if the slider is still held, in
+                milliseconds, defaults to 300.
+        """
+        self._widget = widget
+        self._render = render
+        self._frame_budget = frame_budget_ms / 1000
+        self._pending: Dict[str, Any] = {}
+        self._scheduled: Optional[str] = None
+        self._next_render_time = 0.
+        self._refine = refine
+        self._refine_delay_ms = refine_delay_ms
+        self._refine_scheduled: Optional[str] = None
+        self._dragging = False
+        self._previewing = False
+        self._previewed = False
+
+    def submit(self, param: str, value: Any):
+        """
+        Record the latest value of a parameter and schedule a render if none is pending.
+
+        :param param: str
+
+        :param value: Any
+        """
+        self._pending[param] = value
+        if self._scheduled is not None:
+            return
+
+        delay_ms = int(1000 * (self._next_render_time - time.perf_counter()))
+        if delay_ms > 0:
+            self._scheduled = self._widget.after(delay_ms, self._run)
+        else:
+            self._scheduled = self._widget.after_idle(self._run)
+
+    def flush(self):
+        """
+        Synchronously render the pending updates, if any.
+        """
+        if self._scheduled is not None:
+            self._widget.after_cancel(self._scheduled)
+            self._scheduled = None
+        self._run()
+
+    def cancel(self):
+        """
+        Cancel the scheduled render and refining pass, and drop the pending updates.
+        """
+        self._pending = {}
+        if self._scheduled is not None:
+            self._widget.after_cancel(self._scheduled)
+            self._scheduled = None
+        self._cancel_refine()
+        self._previewed = False
+
+    def bind_drag(self, scale: tk.Scale):
+        """
+        Render previews while a slider is dragged.
+
+        :param scale: tk.Scale
+        """
+        scale.bind("<ButtonPress-1>", lambda event: self._start_drag(), add="+")
+        scale.bind("<ButtonRelease-1>", lambda event: self._end_drag(), add="+")
+
+    def previewing(self) -> bool:
+        """
+        :return: bool
+                Whether the running render is a preview, which a refining pass will replace.
+        """
+        return self._previewing
+
+    def _start_drag(self):
+        self._dragging = True
+
+    def _end_drag(self):
+        self._dragging = False
+        self._cancel_refine()
+        if self._pending:
+            self.flush()
+        elif self._previewed:
+            self._run_refine()
+
+    def _run(self):
+        self._scheduled = None
+        if not self._pending:
+            return
+
+        values, self._pending = self._pending, {}
+        self._next_render_time = time.perf_counter() + self._frame_budget
+        self._previewing = self._dragging and self._refine is not None
+        try:
+            self._render(values)
+        finally:
+            self._previewed = self._previewing
+            self._previewing = False
+
+        if self._previewed:
+            self._cancel_refine()
+            self._refine_scheduled = self._widget.after(self._refine_delay_ms, self._run_refine)
+
+    def _run_refine(self):
+        self._refine_scheduled = None
+        # A pending render reschedules the refining pass
+        if self._scheduled is not None:
+            return
+
+        self._previewed = False
+        self._refine()
+
+    def _cancel_refine(self):
+        if self._refine_scheduled is not None:
+            self._widget.after_cancel(self._refine_scheduled)
+            self._refine_scheduled = None
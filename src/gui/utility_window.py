@@ -1,6 +1,7 @@
 import tkinter as tk
+from functools import lru_cache
 from tkinter import ttk
-from typing import Type
+from typing import Any, Tuple, Type
 
 import numpy as np
 from matplotlib.figure import Figure
@@ -11,9 +12,43 @@ from definitions import SLIDER_RESOLUTION_INTEGER, SLIDER_RESOLUTION_NON_INTEGER
 from histogram import DPHistogram
 from query import DPQuery
 from region_figures import MultiRegionFigure
+from render_scheduler import RenderScheduler
 
 _SLIDER_LENGTH = 300
 _WINDOW_SIZE = "1300x900"
+_SIMULATION_TRIALS = 200
+_SIMULATION_SEED = 0
+_SIMULATION_QUANTILES = (0.05, 0.95)
+_SIMULATION_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=_SIMULATION_CACHE_SIZE)
+def _simulated_utility(
+        dpqcls: Type[DPQuery],
+        main_param: str,
+        x_vals: Tuple[float, ...],
+        other_args: Tuple[Tuple[str, Any], ...]
+) -> np.ndarray:
+    """
+    Simulated utilities of a query over the sweep of its main parameter, cached per value of the other parameters, so
+    that moving the main slider or coming back to previous values does not run the simulation again.
+
+    :param dpqcls: Type[DPQuery]
+
+    :param main_param: str
+
+    :param x_vals: Tuple[float, ...]
+            Actual values of the main parameter.
+
+    :param other_args: Tuple[Tuple[str, Any], ...]
+            Actual values of the other parameters.
+
+    :return: np.ndarray
+            Utilities, of shape (len(x_vals), _SIMULATION_TRIALS).
+    """
+    return dpqcls.simulate_utility(dict(other_args), main_param, np.array(x_vals), _SIMULATION_TRIALS,
+                                   _SIMULATION_SEED)
+
 
 class UtilityWindow:
     def __init__(self,
@@ -41,7 +76,10 @@ class UtilityWindow:
         self._utility_plot = None
         self._privacy_canvas = None
         self._privacy_fig = None
+        self._privacy_reg_id = None
         self._log_y = tk.BooleanVar(value=False)
+        self._simulate = tk.BooleanVar(value=False)
+        self._render_scheduler = None
 
         self.build_sliders(main_param)
         self.plot_utility(main_param)
@@ -65,6 +103,13 @@ class UtilityWindow:
             variable=self._log_y
         )
         log_utility_check.pack()
+        simulate_check = ttk.Checkbutton(
+            utility_toolbar_frame,
+            command=lambda: self.replot_utility(main_param),
+            text='Simulated utility',
+            variable=self._simulate
+        )
+        simulate_check.pack()
         utility_toolbar_frame.grid(column=0, row=1, sticky="n")
         self._utility_canvas.get_tk_widget().grid(column=0, row=0)
 
@@ -94,7 +139,10 @@ class UtilityWindow:
                 {self._dpqcls.params_to_kwargs()[param]: param_vals[param]}
             )
 
-        utility_plotting_func(x_vals, self._dpqcls.utility_func(**kwargs_builder))
+        utility_plotting_func(x_vals, self._dpqcls.utility_func(**kwargs_builder), label="Analytic")
+        if self._simulate.get():
+            self.plot_simulated_utility(main_param, x_vals, param_vals, utility_plotting_func)
+            utility_plot.legend()
         utility_plot.axvline(x=main_param_val, color='black', linestyle='--')
         utility_plot.set_xlabel(self._dpqcls.params_to_graph_labels()[main_param])
         utility_plot.set_title(self._dpqcls.utility_label())
@@ -102,6 +150,34 @@ class UtilityWindow:
         self._utility_canvas.draw()
         self._utility_canvas.flush_events()
 
+    def plot_simulated_utility(self, main_param: str, x_vals: np.ndarray, param_vals: dict, utility_plotting_func):
+        """
+        Plot the mean of the simulated utility and a band between two of its quantiles.
+
+        :param main_param: str
+
+        :param x_vals: np.ndarray
+                Actual values of the main parameter.
+
+        :param param_vals: dict
+                Actual values of the other parameters.
+
+        :param utility_plotting_func:
+                Plotting function of the utility axes, setting their scales.
+        """
+        integers = self._dpqcls.params_are_integers()
+        if integers[main_param]:
+            x_vals = np.round(x_vals)
+        other_args = tuple((param, int(round(val)) if integers[param] else val) for param, val in param_vals.items())
+
+        utilities = _simulated_utility(self._dpqcls, main_param, tuple(x_vals), other_args)
+        lower, upper = np.quantile(utilities, _SIMULATION_QUANTILES, axis=1)
+
+        line, = utility_plotting_func(x_vals, utilities.mean(axis=1), label=f"Simulated ({_SIMULATION_TRIALS} trials)")
+        self._utility_plot.fill_between(x_vals, lower, upper, color=line.get_color(), alpha=0.3,
+                                        label=f"Simulated {_SIMULATION_QUANTILES[0]:.0%}-"
+                                              f"{_SIMULATION_QUANTILES[1]:.0%} quantiles")
+
     def plot_privacy(self):
         self._privacy_fig = MultiRegionFigure(show_line=False)
         self._privacy_canvas = FigureCanvasTkAgg(self._privacy_fig.get_figure(), master=self._window)
@@ -113,7 +189,7 @@ class UtilityWindow:
         privacy_toolbar_frame.grid(column=1, row=2)
         self._privacy_canvas.get_tk_widget().grid(column=1, row=0, rowspan=3)
 
-    def replot_privacy(self):
+    def replot_privacy(self, preview=False):
         def _graph_label() -> str:
             def _param_label(param: str):
                 if self._dpqcls.params_are_integers()[param]:
@@ -122,35 +198,42 @@ class UtilityWindow:
             return f"({", ".join([_param_label(param) for param in self._dpqcls.params() 
                                   if self._dpqcls.params_change_privacy()[param]])})"
 
-        self._privacy_fig.reset_figure()
         construct_args = {param: self._param_vals[param].get() for param in self._dpqcls.params()}
         for param in self._dpqcls.params():
             if self._dpqcls.params_are_in_logscale()[param]:
                 construct_args[param] = 10 ** self._param_vals[param].get()
 
 
-        self._privacy_fig.add_region(
-            self._dpqcls(**construct_args).privacy_region(),
-            _graph_label()
-        )
-        self._privacy_fig.finish_figure(self._dpqcls.privacy_plot_title())
+        region = self._dpqcls(**construct_args).privacy_region()
+        key = (self._dpqcls, tuple(construct_args[param] for param in self._dpqcls.params()
+                                   if self._dpqcls.params_change_privacy()[param]))
+        if self._privacy_reg_id is None:
+            self._privacy_reg_id = self._privacy_fig.add_region(region, _graph_label(), key=key)
+        else:
+            self._privacy_fig.update_region(self._privacy_reg_id, region, _graph_label(), key=key)
+        self._privacy_fig.draw_figure(self._dpqcls.privacy_plot_title(), preview=preview)
 
         self._privacy_canvas.draw()
         self._privacy_canvas.flush_events()
 
-    def replot_privacy_and_utility(self, main_param: str):
+    def replot_privacy_and_utility(self, main_param: str, preview=False):
         def func(_):
             self.replot_utility(main_param)
-            self.replot_privacy()
+            self.replot_privacy(preview)
         return func
 
     def build_sliders(self, main_param: str):
 
+        def render(param_vals):
+            if any(self._dpqcls.params_change_privacy()[param] for param in param_vals):
+                self.replot_privacy_and_utility(main_param, self._render_scheduler.previewing())(param_vals)
+            else:
+                self.replot_utility(main_param)
+
         def slider_command(slider_param: str):
-            if self._dpqcls.params_change_privacy()[slider_param]:
-                return self.replot_privacy_and_utility(main_param)
+            return lambda x: self._render_scheduler.submit(slider_param, x)
 
-            return lambda x: self.replot_utility(main_param)
+        self._render_scheduler = RenderScheduler(self._window, render, refine=self.replot_privacy)
 
         slider_frame = tk.Frame(self._window)
 
@@ -174,6 +257,8 @@ class UtilityWindow:
                              orient=tk.HORIZONTAL,
                              length=_SLIDER_LENGTH)
 
+            self._render_scheduler.bind_drag(scale)
+
             scale.grid(column=1, row=idx)
             label = tk.Label(slider_frame, text=labels_map[param])
             label.grid(column=0, row=idx)
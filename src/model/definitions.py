@@ -7,6 +7,7 @@ Region = Sequence[Constraint]
 
 TradeOffFunction = Callable[[np.ndarray], np.ndarray] # fn = f(fp)
 ScoreFunction = Callable[[np.ndarray, Any], np.ndarray]
+SeedLike = np.random.Generator | np.random.SeedSequence | int | None # anything np.random.default_rng accepts
 
 SLIDER_RESOLUTION_NON_INTEGER = 0.01
 SLIDER_RESOLUTION_INTEGER = 1
@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 from typing import Dict, Tuple, Type
 
 from definitions import Region, SLIDER_RESOLUTION_NON_INTEGER
+from lookup_tables import lookup_region
+from pld import composition_grid_step, dp_pld
 from regions import *
 
 from mechanisms import laplace_mechanism, gaussian_mechanism, randomized_response_mechanism
@@ -65,6 +67,25 @@ class AdaptedRegionComputer(ABC):
         pass
 
 
+def compute_region(adapter: Type[AdaptedRegionComputer], **kwargs) -> Region:
+    """
+    Compute the region of an adapter, served from its precomputed lookup table when the parameters lie on its slider
+    lattice.
+
+    :param adapter: Type[AdaptedRegionComputer]
+
+    :param kwargs:
+            Actual (not slider) parameter values.
+
+    :return: Region
+    """
+    curve = lookup_region(adapter, kwargs)
+    if curve is not None:
+        return curve
+
+    return adapter.region_computation(**kwargs)
+
+
 def intersected_regions(regions: List[Region], name: str) -> Type[AdaptedRegionComputer]:
     class IntersectedRegions(AdaptedRegionComputer):
 
@@ -244,7 +265,7 @@ class DPExactCompositionRegion(AdaptedRegionComputer):
         return {
             'eps': (-3, 1),
             'delta': (0.0, 1.0),
-            'k': (1, 100)
+            'k': (1, 10000)
         }
 
     @staticmethod
@@ -339,6 +360,106 @@ class DPSimplifiedCompositionRegion(AdaptedRegionComputer):
     def region_graph_name() -> str:
         return "DP simplified comp."
 
+class DPHeterogeneousCompositionRegion(AdaptedRegionComputer):
+
+    @staticmethod
+    def region_computation(*args, **kwargs) -> Region:
+        # Both groups are homogeneous: each is composed with itself through a single FFT power
+        dx = composition_grid_step(max(kwargs['eps1'], kwargs['eps2']), kwargs['k1'] + kwargs['k2'])
+        return region_from_pld_composition(
+            [dp_pld(kwargs['eps1'], kwargs['delta1'], dx), dp_pld(kwargs['eps2'], kwargs['delta2'], dx)],
+            [kwargs['k1'], kwargs['k2']]
+        )
+
+    @staticmethod
+    def params() -> List[str]:
+        return ['eps1', 'delta1', 'k1', 'eps2', 'delta2', 'k2']
+
+    @staticmethod
+    def params_to_kwargs() -> Dict[str, str]:
+        return {
+            'eps1': 'eps1',
+            'delta1': 'delta1',
+            'k1': 'k1',
+            'eps2': 'eps2',
+            'delta2': 'delta2',
+            'k2': 'k2'
+        }
+
+    @staticmethod
+    def params_are_integers() -> Dict[str, bool]:
+        return {
+            'eps1': False,
+            'delta1': False,
+            'k1': True,
+            'eps2': False,
+            'delta2': False,
+            'k2': True
+        }
+
+    @staticmethod
+    def params_are_logscale() -> Dict[str, bool]:
+        return {
+            'eps1': True,
+            'delta1': False,
+            'k1': False,
+            'eps2': True,
+            'delta2': False,
+            'k2': False
+        }
+
+    @staticmethod
+    def params_to_slider_labels() -> Dict[str, str]:
+        return {
+            'eps1': 'log(ε₁)',
+            'delta1': 'δ₁',
+            'k1': 'Number of mechanisms (k₁)',
+            'eps2': 'log(ε₂)',
+            'delta2': 'δ₂',
+            'k2': 'Number of mechanisms (k₂)'
+        }
+
+    @staticmethod
+    def params_to_graph_labels() -> Dict[str, str]:
+        return {
+            'eps1': '$\\epsilon_1$',
+            'delta1': '$\\delta_1$',
+            'k1': '$k_1$',
+            'eps2': '$\\epsilon_2$',
+            'delta2': '$\\delta_2$',
+            'k2': '$k_2$'
+        }
+
+    @staticmethod
+    def params_to_default_vals() -> Dict[str, float]:
+        return {
+            'eps1': np.log10(0.6),
+            'delta1': 0.01,
+            'k1': 2,
+            'eps2': np.log10(0.1),
+            'delta2': 0.001,
+            'k2': 10
+        }
+
+    @staticmethod
+    def params_to_limits() -> Dict[str, Tuple[float, float]]:
+        return {
+            'eps1': (-3, 1),
+            'delta1': (0.0, 1.0),
+            'k1': (0, 100),
+            'eps2': (-3, 1),
+            'delta2': (0.0, 1.0),
+            'k2': (0, 100)
+        }
+
+    @staticmethod
+    def adder_label() -> str:
+        return 'DP heterogeneous composition region'
+
+    @staticmethod
+    def region_graph_name() -> str:
+        return "DP heterogeneous comp."
+
 class DPBasicCompositionRegion(AdaptedRegionComputer):
 
     @staticmethod
@@ -556,7 +677,7 @@ class DPTVCompositionRegion(AdaptedRegionComputer):
             'eps': (-3, 1),
             'delta': (0.0, 1.0),
             'eta': (0.0, 1.0),
-            'k': (1, 100)
+            'k': (1, 1000)
         }
 
     @staticmethod
@@ -882,3 +1003,288 @@ class RandomizedResponseRegion(AdaptedRegionComputer):
     @staticmethod
     def region_graph_name() -> str:
         return "RR mech."
+
+class LaplacePLDCompositionRegion(AdaptedRegionComputer):
+    @staticmethod
+    def region_computation(*args, **kwargs) -> Region:
+        dx = composition_grid_step(kwargs['eps'], kwargs['k'])
+        pld = laplace_mechanism.LaplaceMechanism(kwargs['eps'], 1).privacy_loss_distribution(dx)
+        return region_from_pld_composition([pld], [kwargs['k']])
+
+    @staticmethod
+    def params() -> List[str]:
+        return ['eps', 'k']
+
+    @staticmethod
+    def params_to_kwargs() -> Dict[str, str]:
+        return {
+            'eps': 'eps',
+            'k': 'k'
+        }
+
+    @staticmethod
+    def params_are_integers() -> Dict[str, bool]:
+        return {
+            'eps': False,
+            'k': True
+        }
+
+    @staticmethod
+    def params_are_logscale() -> Dict[str, bool]:
+        return {
+            'eps': True,
+            'k': False
+        }
+
+    @staticmethod
+    def params_to_slider_labels() -> Dict[str, str]:
+        return {
+            'eps': 'log(ε)',
+            'k': 'Number of mechanisms (k)'
+        }
+
+    @staticmethod
+    def params_to_graph_labels() -> Dict[str, str]:
+        return {
+            'eps': '$\\epsilon$',
+            'k': '$k$'
+        }
+
+    @staticmethod
+    def params_to_default_vals() -> Dict[str, float]:
+        return {
+            'eps': np.log10(0.1),
+            'k': 100
+        }
+
+    @staticmethod
+    def params_to_limits() -> Dict[str, Tuple[float, float]]:
+        return {
+            'eps': (-3, 1),
+            'k': (1, 10000)
+        }
+
+    @staticmethod
+    def adder_label() -> str:
+        return "Laplace mechanism composition (PLD)"
+
+    @staticmethod
+    def region_graph_name() -> str:
+        return "Laplace mech. comp."
+
+class RandomizedResponsePLDCompositionRegion(AdaptedRegionComputer):
+    @staticmethod
+    def region_computation(*args, **kwargs) -> Region:
+        dx = composition_grid_step(kwargs['eps'], kwargs['k'])
+        pld = randomized_response_mechanism.RandomizedResponseMech(kwargs['eps'], kwargs['m']) \
+            .privacy_loss_distribution(dx)
+        return region_from_pld_composition([pld], [kwargs['k']])
+
+    @staticmethod
+    def params() -> List[str]:
+        return ['eps', 'm', 'k']
+
+    @staticmethod
+    def params_to_kwargs() -> Dict[str, str]:
+        return {
+            'eps': 'eps',
+            'm': 'm',
+            'k': 'k'
+        }
+
+    @staticmethod
+    def params_are_logscale():
+        return {
+            'eps': True,
+            'm': False,
+            'k': False
+        }
+
+    @staticmethod
+    def params_are_integers():
+        return {
+            'eps': False,
+            'm': True,
+            'k': True
+        }
+
+    @staticmethod
+    def params_to_slider_labels() -> Dict[str, str]:
+        return {
+            'eps': 'log(ε)',
+            'm': 'Alphabet size (m)',
+            'k': 'Number of mechanisms (k)'
+        }
+
+    @staticmethod
+    def params_to_graph_labels() -> Dict[str, str]:
+        return {
+            'eps': '$\\epsilon$',
+            'm': '$m$',
+            'k': '$k$'
+        }
+
+    @staticmethod
+    def params_to_default_vals() -> Dict[str, float]:
+        return {
+            'eps': np.log10(0.1),
+            'm': 5,
+            'k': 100
+        }
+
+    @staticmethod
+    def params_to_limits() -> Dict[str, Tuple[float, float]]:
+        return {
+            'eps': (-3, 1),
+            'm': (2, 100),
+            'k': (1, 10000)
+        }
+
+    @staticmethod
+    def adder_label() -> str:
+        return "Randomized response composition (PLD)"
+
+    @staticmethod
+    def region_graph_name() -> str:
+        return "RR mech. comp."
+
+class LaplaceRDPCompositionRegion(AdaptedRegionComputer):
+    @staticmethod
+    def region_computation(*args, **kwargs) -> Region:
+        rdp = laplace_mechanism.LaplaceMechanism(kwargs['eps'], 1).renyi_dp()
+        return region_from_rdp_composition([rdp], [kwargs['k']])
+
+    @staticmethod
+    def params() -> List[str]:
+        return ['eps', 'k']
+
+    @staticmethod
+    def params_to_kwargs() -> Dict[str, str]:
+        return {
+            'eps': 'eps',
+            'k': 'k'
+        }
+
+    @staticmethod
+    def params_are_integers() -> Dict[str, bool]:
+        return {
+            'eps': False,
+            'k': True
+        }
+
+    @staticmethod
+    def params_are_logscale() -> Dict[str, bool]:
+        return {
+            'eps': True,
+            'k': False
+        }
+
+    @staticmethod
+    def params_to_slider_labels() -> Dict[str, str]:
+        return {
+            'eps': 'log(ε)',
+            'k': 'Number of mechanisms (k)'
+        }
+
+    @staticmethod
+    def params_to_graph_labels() -> Dict[str, str]:
+        return {
+            'eps': '$\\epsilon$',
+            'k': '$k$'
+        }
+
+    @staticmethod
+    def params_to_default_vals() -> Dict[str, float]:
+        return {
+            'eps': np.log10(0.1),
+            'k': 100
+        }
+
+    @staticmethod
+    def params_to_limits() -> Dict[str, Tuple[float, float]]:
+        return {
+            'eps': (-3, 1),
+            'k': (1, 100000)
+        }
+
+    @staticmethod
+    def adder_label() -> str:
+        return "Laplace mechanism composition (RDP)"
+
+    @staticmethod
+    def region_graph_name() -> str:
+        return "Laplace mech. RDP comp."
+
+class RandomizedResponseRDPCompositionRegion(AdaptedRegionComputer):
+    @staticmethod
+    def region_computation(*args, **kwargs) -> Region:
+        rdp = randomized_response_mechanism.RandomizedResponseMech(kwargs['eps'], kwargs['m']).renyi_dp()
+        return region_from_rdp_composition([rdp], [kwargs['k']])
+
+    @staticmethod
+    def params() -> List[str]:
+        return ['eps', 'm', 'k']
+
+    @staticmethod
+    def params_to_kwargs() -> Dict[str, str]:
+        return {
+            'eps': 'eps',
+            'm': 'm',
+            'k': 'k'
+        }
+
+    @staticmethod
+    def params_are_logscale():
+        return {
+            'eps': True,
+            'm': False,
+            'k': False
+        }
+
+    @staticmethod
+    def params_are_integers():
+        return {
+            'eps': False,
+            'm': True,
+            'k': True
+        }
+
+    @staticmethod
+    def params_to_slider_labels() -> Dict[str, str]:
+        return {
+            'eps': 'log(ε)',
+            'm': 'Alphabet size (m)',
+            'k': 'Number of mechanisms (k)'
+        }
+
+    @staticmethod
+    def params_to_graph_labels() -> Dict[str, str]:
+        return {
+            'eps': '$\\epsilon$',
+            'm': '$m$',
+            'k': '$k$'
+        }
+
+    @staticmethod
+    def params_to_default_vals() -> Dict[str, float]:
+        return {
+            'eps': np.log10(0.1),
+            'm': 5,
+            'k': 100
+        }
+
+    @staticmethod
+    def params_to_limits() -> Dict[str, Tuple[float, float]]:
+        return {
+            'eps': (-3, 1),
+            'm': (2, 100),
+            'k': (1, 100000)
+        }
+
+    @staticmethod
+    def adder_label() -> str:
+        return "Randomized response composition (RDP)"
+
+    @staticmethod
+    def region_graph_name() -> str:
+        return "RR mech. RDP comp."
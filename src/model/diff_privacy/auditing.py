@@ -0,0 +1,378 @@
+"""
+Monte Carlo auditing of the privacy regions of mechanisms.
+
+A mechanism is run many times on a pair of neighboring datasets x0 and x1, and a test statistic of its outputs is
+thresholded to decide between them. The false positive (deciding x1 under x0) and false negative rates of every
+threshold are points of the region of the mechanism, so that they can never fall strictly below its trade-off
+function: the lower convex hull of these points is an empirical trade-off curve, to be compared with the analytic one.
+
+Trials are run in vectorized batches, in a process pool whose workers draw from generators spawned from the one of the
+mechanism, and only return the histograms of their statistics over thresholds set by a pilot batch. Audits are run by
+this module, e.g.::
+
+    python auditing.py laplace --eps 1 --trials 10000000 -o laplace_audit.png
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+from scipy import stats
+
+from tradeoff_curves import TradeOffCurve
+
+# (outputs of a batch of trials, x0, x1) -> statistic of every trial, large when the output comes from x1
+TestStatistic = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+_DEFAULT_TRIALS = 1_000_000
+_DEFAULT_BATCH_SIZE = 100_000
+_DEFAULT_PILOT_TRIALS = 100_000
+_DEFAULT_THRESHOLDS = 1000
+_DEFAULT_CONFIDENCE = 0.95
+
+
+def projection_statistic(outputs: np.ndarray, x0: np.ndarray, x1: np.ndarray) -> np.ndarray:
+    """
+    Projection of the outputs onto x1 - x0, which gives the optimal tests of additive mechanisms.
+
+    :param outputs: np.ndarray
+            Outputs of a batch of trials, of shape (batch,) + x0.shape.
+
+    :param x0: np.ndarray
+
+    :param x1: np.ndarray
+
+    :return: np.ndarray
+            Statistic of every trial.
+    """
+    direction = (np.asarray(x1, dtype=float) - np.asarray(x0, dtype=float)).ravel()
+    return outputs.reshape(len(outputs), -1) @ direction
+
+
+def equality_statistic(outputs: np.ndarray, x0: np.ndarray, x1: np.ndarray) -> np.ndarray:
+    """
+    Number of entries equal to those of x1 minus number of entries equal to those of x0, which gives the optimal tests
+    of randomized response.
+
+    :param outputs: np.ndarray
+            Outputs of a batch of trials, of shape (batch,) + x0.shape.
+
+    :param x0: np.ndarray
+
+    :param x1: np.ndarray
+
+    :return: np.ndarray
+            Statistic of every trial.
+    """
+    outputs = outputs.reshape(len(outputs), -1)
+    return (np.count_nonzero(outputs == np.ravel(x1), axis=1)
+            - np.count_nonzero(outputs == np.ravel(x0), axis=1)).astype(float)
+
+
+class EmpiricalTradeOff:
+    """
+    Error rates of the threshold tests of an audit, along with their Clopper-Pearson confidence intervals.
+    """
+
+    def __init__(self,
+        thresholds: np.ndarray,
+        false_positives: np.ndarray,
+        false_negatives: np.ndarray,
+        n_trials: int,
+        confidence: float = _DEFAULT_CONFIDENCE
+    ):
+        """
+        Construct the trade-off from the error counts of the tests.
+
+        :param thresholds: np.ndarray
+                Increasing thresholds, x1 being decided when the statistic exceeds them.
+
+        :param false_positives: np.ndarray
+                Number of trials on x0 whose statistic exceeds every threshold.
+
+        :param false_negatives: np.ndarray
+                Number of trials on x1 whose statistic does not exceed every threshold.
+
+        :param n_trials: int
+                Number of trials on each dataset.
+
+        :param confidence: float
+                Level of the pointwise confidence intervals, defaults to 0.95.
+        """
+        self._thresholds = thresholds
+        self._n_trials = n_trials
+        self._confidence = confidence
+        self._false_positives = false_positives
+        self._false_negatives = false_negatives
+        self._fp = false_positives / n_trials
+        self._fn = false_negatives / n_trials
+        self._fp_bounds = clopper_pearson(false_positives, n_trials, confidence)
+        self._fn_bounds = clopper_pearson(false_negatives, n_trials, confidence)
+
+    def thresholds(self) -> np.ndarray:
+        return self._thresholds
+
+    def n_trials(self) -> int:
+        return self._n_trials
+
+    def rates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: Tuple[np.ndarray, np.ndarray]
+                False positive and false negative rates of every threshold.
+        """
+        return self._fp, self._fn
+
+    def curve(self) -> TradeOffCurve:
+        """
+        Empirical trade-off curve: lower convex hull of the error rates, randomized tests mixing two thresholds.
+
+        :return: TradeOffCurve
+        """
+        return lower_convex_hull(self._fp, self._fn)
+
+    def confidence_band(self) -> Tuple[TradeOffCurve, TradeOffCurve]:
+        """
+        Curves through the lower and upper ends of the confidence intervals of the error rates.
+
+        :return: Tuple[TradeOffCurve, TradeOffCurve]
+        """
+        return (lower_convex_hull(self._fp_bounds[0], self._fn_bounds[0]),
+                lower_convex_hull(self._fp_bounds[1], self._fn_bounds[1]))
+
+    def violations(self, f: Callable[[np.ndarray], np.ndarray], tolerance: float = 1e-9) -> np.ndarray:
+        """
+        Thresholds whose error rates fall below a trade-off function even at the upper ends of their confidence
+        intervals, which is evidence that the function overstates the privacy of the mechanism.
+
+        The intervals are widened to the Bonferroni-corrected level 1 - (1 - confidence) / len(thresholds), so that
+        a mechanism satisfying f shows any violation with probability at most 1 - confidence, however many
+        thresholds are tested.
+
+        :param f: Callable[[np.ndarray], np.ndarray]
+                Analytic trade-off function, e.g. a TradeOffCurve.
+
+        :param tolerance: float
+                Numerical tolerance, defaults to 1e-9.
+
+        :return: np.ndarray
+                Boolean mask over the thresholds.
+        """
+        level = 1 - (1 - self._confidence) / max(len(self._thresholds), 1)
+        fp_upper = clopper_pearson(self._false_positives, self._n_trials, level)[1]
+        fn_upper = clopper_pearson(self._false_negatives, self._n_trials, level)[1]
+        # f is non-increasing, so the upper corner of the confidence box is the closest to its region
+        return fn_upper < f(fp_upper) - tolerance
+
+
+def clopper_pearson(counts: np.ndarray, n: int, confidence: float = _DEFAULT_CONFIDENCE) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact binomial confidence intervals of proportions.
+
+    :param counts: np.ndarray
+            Numbers of successes.
+
+    :param n: int
+            Number of trials.
+
+    :param confidence: float
+            Level of the intervals, defaults to 0.95.
+
+    :return: Tuple[np.ndarray, np.ndarray]
+            Lower and upper ends of the intervals.
+    """
+    counts = np.asarray(counts, dtype=float)
+    alpha = 1 - confidence
+    with np.errstate(invalid='ignore'):
+        lower = np.where(counts > 0, stats.beta.ppf(alpha / 2, counts, n - counts + 1), 0.)
+        upper = np.where(counts < n, stats.beta.ppf(1 - alpha / 2, counts + 1, n - counts), 1.)
+    return lower, upper
+
+
+def lower_convex_hull(fp: np.ndarray, fn: np.ndarray) -> TradeOffCurve:
+    """
+    Trade-off curve of the tests achieving the given error rates and of their mixtures, including the trivial tests.
+
+    :param fp: np.ndarray
+            False positive rates.
+
+    :param fn: np.ndarray
+            False negative rates.
+
+    :return: TradeOffCurve
+    """
+    fp = np.concatenate(([0., 1.], np.ravel(fp)))
+    fn = np.concatenate(([1., 0.], np.ravel(fn)))
+
+    # Only the best false negative rate of every false positive rate can be on the hull
+    order = np.lexsort((fn, fp))
+    fp, fn = fp[order], fn[order]
+    fp, starts = np.unique(fp, return_index=True)
+    fn = fn[starts]
+
+    hull: List[int] = []
+    for idx in range(len(fp)):
+        while len(hull) >= 2:
+            i, j = hull[-2], hull[-1]
+            if (fp[j] - fp[i]) * (fn[idx] - fn[i]) - (fn[j] - fn[i]) * (fp[idx] - fp[i]) > 0:
+                break
+            hull.pop()
+        hull.append(idx)
+
+    return TradeOffCurve(fp[hull], fn[hull])
+
+
+def audit_mechanism(
+        mech: Any,
+        x0: np.ndarray,
+        x1: np.ndarray,
+        statistic: TestStatistic = projection_statistic,
+        n_trials: int = _DEFAULT_TRIALS,
+        batch_size: int = _DEFAULT_BATCH_SIZE,
+        n_thresholds: int = _DEFAULT_THRESHOLDS,
+        confidence: float = _DEFAULT_CONFIDENCE,
+        workers: Optional[int] = None
+) -> EmpiricalTradeOff:
+    """
+    Estimate the trade-off curve of a mechanism on a pair of neighboring datasets.
+
+    A pilot batch, discarded afterwards, sets the thresholds at quantiles of the statistic, then n_trials trials on
+    each dataset are split among the workers.
+
+    :param mech: Mechanism
+            Audited mechanism, whose apply randomizes every entry of its input independently, so that trials are
+            batched by stacking copies of the datasets. Workers draw from generators spawned from its own.
+
+    :param x0: np.ndarray
+
+    :param x1: np.ndarray
+            Neighbor of x0, of the same shape.
+
+    :param statistic: TestStatistic
+            Picklable test statistic, defaults to projection_statistic.
+
+    :param n_trials: int
+            Number of trials on each dataset, defaults to 10^6.
+
+    :param batch_size: int
+            Number of trials run at once, defaults to 10^5.
+
+    :param n_thresholds: int
+            Maximal number of thresholds, defaults to 1000.
+
+    :param confidence: float
+            Level of the confidence intervals, defaults to 0.95.
+
+    :param workers: Optional[int]
+            Number of worker processes, defaults to the number of CPUs. A single worker runs in the calling process.
+
+    :return: EmpiricalTradeOff
+    """
+    x0, x1 = np.asarray(x0), np.asarray(x1)
+    assert x0.shape == x1.shape
+
+    n_workers = workers if workers is not None else os.cpu_count() or 1
+    n_workers = max(1, min(n_workers, -(-n_trials // batch_size)))
+    pilot_rng, *worker_rngs = mech.spawn(n_workers + 1)
+
+    pilot_mech = mech.with_rng(pilot_rng)
+    pilot_trials = min(n_trials, _DEFAULT_PILOT_TRIALS)
+    pilot = np.concatenate([statistic(_run_batch(pilot_mech, x, pilot_trials), x0, x1) for x in (x0, x1)])
+    thresholds = np.unique(np.quantile(pilot, np.linspace(0, 1, n_thresholds), method='inverted_cdf'))
+
+    shares = [len(share) for share in np.array_split(np.arange(n_trials), n_workers)]
+    jobs = [(mech.with_rng(rng), x0, x1, statistic, thresholds, share, batch_size)
+            for rng, share in zip(worker_rngs, shares)]
+    if n_workers == 1:
+        histograms = [_count_statistics(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            histograms = list(executor.map(_count_statistics, *zip(*jobs)))
+
+    hist0 = sum(hist for hist, _ in histograms)
+    hist1 = sum(hist for _, hist in histograms)
+    # hist[i] counts the statistics in (thresholds[i - 1], thresholds[i]]
+    above0 = n_trials - np.cumsum(hist0)[:-1]
+    below1 = np.cumsum(hist1)[:-1]
+
+    return EmpiricalTradeOff(thresholds, above0, below1, n_trials, confidence)
+
+
+def _run_batch(mech: Any, x: np.ndarray, size: int) -> np.ndarray:
+    return np.asarray(mech.apply(np.broadcast_to(x, (size,) + x.shape)))
+
+
+def _count_statistics(
+        mech: Any,
+        x0: np.ndarray,
+        x1: np.ndarray,
+        statistic: TestStatistic,
+        thresholds: np.ndarray,
+        n_trials: int,
+        batch_size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    histograms = (np.zeros(len(thresholds) + 1, dtype=np.int64), np.zeros(len(thresholds) + 1, dtype=np.int64))
+    for start in range(0, n_trials, batch_size):
+        size = min(batch_size, n_trials - start)
+        for x, hist in zip((x0, x1), histograms):
+            values = statistic(_run_batch(mech, x, size), x0, x1)
+            hist += np.bincount(np.searchsorted(thresholds, values, side='left'), minlength=len(hist))
+
+    return histograms
+
+
+def _audited_mechanism(args: argparse.Namespace) -> Tuple[Any, np.ndarray, np.ndarray, TestStatistic]:
+    if args.mechanism == "laplace":
+        from laplace_mechanism import LaplaceMechanism
+        mech = LaplaceMechanism(args.eps, args.sensitivity, args.seed)
+        return mech, np.zeros(1), np.full(1, args.sensitivity), projection_statistic
+    if args.mechanism == "gaussian":
+        from gaussian_mechanism import GaussianMechanism
+        mech = GaussianMechanism(args.eps, args.delta, args.sensitivity, args.seed)
+        return mech, np.zeros(1), np.full(1, args.sensitivity), projection_statistic
+
+    from randomized_response_mechanism import RandomizedResponseMech
+    mech = RandomizedResponseMech(args.eps, args.alphabet_size, args.seed)
+    return mech, np.ones(1, dtype=int), np.full(1, 2), equality_statistic
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare the empirical trade-off curve of a mechanism with its "
+                                                 "analytic privacy region.")
+    parser.add_argument("mechanism", choices=["laplace", "gaussian", "rr"])
+    parser.add_argument("--eps", type=float, default=1.)
+    parser.add_argument("--delta", type=float, default=1e-5, help="delta of the Gaussian mechanism")
+    parser.add_argument("--sensitivity", type=float, default=1., help="sensitivity of additive mechanisms")
+    parser.add_argument("--alphabet-size", type=int, default=2, help="alphabet size of randomized response")
+    parser.add_argument("-n", "--trials", type=int, default=_DEFAULT_TRIALS, help="number of trials per dataset")
+    parser.add_argument("--batch-size", type=int, default=_DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("-j", "--workers", type=int, help="number of worker processes, defaults to the number of CPUs")
+    parser.add_argument("-o", "--output", help="figure overlaying the empirical curve on the analytic region")
+    args = parser.parse_args(argv)
+
+    mech, x0, x1, statistic = _audited_mechanism(args)
+    audit = audit_mechanism(mech, x0, x1, statistic, args.trials, args.batch_size, workers=args.workers)
+    analytic = mech.tradeoff_curve()
+
+    fp, fn = audit.rates()
+    print(f"{len(audit.thresholds())} thresholds, {audit.n_trials()} trials per dataset")
+    print(f"largest gap below the analytic curve: {np.max(analytic(fp) - fn, initial=0.):.2e}")
+    print(f"violations at {np.count_nonzero(audit.violations(analytic))} thresholds")
+
+    if args.output:
+        import matplotlib
+        matplotlib.use("Agg")
+        from region_figures import MultiRegionFigure
+
+        fig = MultiRegionFigure(show_line=True)
+        fig.add_region(mech.privacy_region(), "Analytic region")
+        fig.add_curve(audit.curve(), "Empirical trade-off", band=audit.confidence_band())
+        fig.draw_figure(f"Audit of the {args.mechanism} mechanism")
+        fig.save_figure(args.output)
+        fig.close_figure()
+
+
+if __name__ == "__main__":
+    main()
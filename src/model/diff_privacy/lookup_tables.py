@@ -0,0 +1,317 @@
+"""
+Precomputed trade-off curves of the region adapters, tabulated over the lattice of their slider values.
+
+Sliders move by SLIDER_RESOLUTION_NON_INTEGER or SLIDER_RESOLUTION_INTEGER steps within the limits of their parameter,
+so that the regions reachable from the privacy window are finite. An offline build samples the trade-off curve of
+every lattice point of an adapter at fixed false positive rates, and stores them in a .npy file, which is then
+memory-mapped: serving a curve is a matter of indexing, and no curve is read from disk before it is used.
+
+Tables are built by running this module, e.g.::
+
+    python lookup_tables.py DPExactCompositionRegion --range delta=0:0.1 --range k=1:200
+
+Lattices whose table would exceed the byte budget are skipped, and ranges can be narrowed to fit in it.
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from definitions import SLIDER_RESOLUTION_INTEGER, SLIDER_RESOLUTION_NON_INTEGER
+from tradeoff_curves import TradeOffCurve
+
+_DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+_DEFAULT_MAX_BYTES = 2 ** 30
+_DEFAULT_RESOLUTION = 513
+_LATTICE_TOLERANCE = 1e-6
+_CHUNKSIZE = 64
+
+_tables: Dict[str, Optional['LookupTable']] = {}
+_directory = _DEFAULT_DIRECTORY
+
+
+class LookupTable:
+    """
+    Trade-off curves of an adapter, sampled at fixed false positive rates for every point of a lattice of slider
+    values.
+    """
+
+    def __init__(self,
+        fp: np.ndarray,
+        curves: np.ndarray,
+        lattice: Dict[str, np.ndarray],
+        logscale: Dict[str, bool]
+    ):
+        """
+        Construct the table.
+
+        :param fp: np.ndarray
+                False positive rates at which the curves are sampled.
+
+        :param curves: np.ndarray
+                Sampled curves, of shape (*lattice sizes, len(fp)), typically memory-mapped.
+
+        :param lattice: Dict[str, np.ndarray]
+                Evenly spaced slider values of every parameter, in the order of the axes of curves.
+
+        :param logscale: Dict[str, bool]
+                Whether the slider of each parameter is logarithmic, i.e. gives log10 of its value.
+        """
+        assert curves.shape == tuple(len(values) for values in lattice.values()) + fp.shape
+
+        self._fp = fp
+        self._curves = curves
+        self._lattice = lattice
+        self._logscale = logscale
+
+    def lookup(self, kwargs: Dict[str, Any]) -> Optional[TradeOffCurve]:
+        """
+        Serve the curve of a lattice point, without copying it.
+
+        :param kwargs: Dict[str, Any]
+                Actual (not slider) parameter values, as passed to region_computation.
+
+        :return: Optional[TradeOffCurve]
+                Tabulated curve, None if the parameters are not on the lattice.
+        """
+        idx = []
+        for param, values in self._lattice.items():
+            value = float(kwargs[param])
+            if self._logscale[param]:
+                if value <= 0:
+                    return None
+                value = np.log10(value)
+
+            step = values[1] - values[0] if len(values) > 1 else 1.
+            i = int(round((value - values[0]) / step))
+            if not 0 <= i < len(values) or abs(values[i] - value) > _LATTICE_TOLERANCE:
+                return None
+            idx.append(i)
+
+        return TradeOffCurve(self._fp, self._curves[tuple(idx)])
+
+    def nbytes(self) -> int:
+        return self._curves.nbytes
+
+    @staticmethod
+    def load(directory: str, name: str) -> 'LookupTable':
+        """
+        Memory-map the table of an adapter.
+
+        :param directory: str
+
+        :param name: str
+                Class name of the adapter.
+
+        :return: LookupTable
+        """
+        with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+
+        lattice = {param: np.array(values) for param, values in meta["lattice"].items()}
+        return LookupTable(
+            np.load(os.path.join(directory, f"{name}_fp.npy")),
+            np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r'),
+            lattice,
+            meta["logscale"]
+        )
+
+
+def set_lookup_directory(directory: str):
+    """
+    Set the directory tables are loaded from, forgetting the tables loaded so far.
+
+    :param directory: str
+    """
+    global _directory
+    _directory = directory
+    _tables.clear()
+
+
+def lookup_region(adapter: type, kwargs: Dict[str, Any]) -> Optional[TradeOffCurve]:
+    """
+    Serve the region of an adapter from its table, loaded on first use.
+
+    :param adapter: type
+            Adapter class of adapters.py.
+
+    :param kwargs: Dict[str, Any]
+            Actual (not slider) parameter values, as passed to region_computation.
+
+    :return: Optional[TradeOffCurve]
+            Tabulated curve, None if the adapter has no table or the parameters are not on its lattice.
+    """
+    if not adapter.params():
+        return None
+
+    name = adapter.__name__
+    if name not in _tables:
+        exists = os.path.exists(os.path.join(_directory, f"{name}.json"))
+        _tables[name] = LookupTable.load(_directory, name) if exists else None
+
+    table = _tables[name]
+    return None if table is None else table.lookup(kwargs)
+
+
+def slider_lattice(adapter: type, ranges: Optional[Dict[str, Tuple[float, float]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Slider values reachable for every parameter of an adapter.
+
+    :param adapter: type
+            Adapter class of adapters.py.
+
+    :param ranges: Optional[Dict[str, Tuple[float, float]]]
+            Narrower slider ranges of some parameters, defaults to their slider limits.
+
+    :return: Dict[str, np.ndarray]
+    """
+    ranges = {} if ranges is None else ranges
+
+    lattice = {}
+    for param in adapter.params():
+        lo, hi = ranges.get(param, adapter.params_to_limits()[param])
+        step = SLIDER_RESOLUTION_INTEGER if adapter.params_are_integers()[param] else SLIDER_RESOLUTION_NON_INTEGER
+        first = np.ceil(lo / step - _LATTICE_TOLERANCE)
+        last = np.floor(hi / step + _LATTICE_TOLERANCE)
+        lattice[param] = np.round(np.arange(first, last + 1) * step, 10)
+
+    return lattice
+
+
+def build_lookup_table(
+        adapter: type,
+        directory: str = _DEFAULT_DIRECTORY,
+        ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+        resolution: int = _DEFAULT_RESOLUTION,
+        workers: Optional[int] = None
+) -> Optional[str]:
+    """
+    Tabulate the trade-off curves of an adapter over its slider lattice.
+
+    :param adapter: type
+            Adapter class of adapters.py.
+
+    :param directory: str
+            Output directory, defaults to the directory tables are loaded from.
+
+    :param ranges: Optional[Dict[str, Tuple[float, float]]]
+            Narrower slider ranges of some parameters, defaults to their slider limits.
+
+    :param max_bytes: int
+            Maximal size of the table, defaults to 1 GiB.
+
+    :param resolution: int
+            Number of uniformly spaced samples of every curve, defaults to 513.
+
+    :param workers: Optional[int]
+            Number of worker processes, defaults to the number of CPUs.
+
+    :return: Optional[str]
+            Path of the table, None if the adapter has no parameter, its table exceeds max_bytes, or its regions are
+            not trade-off curves.
+    """
+    lattice = slider_lattice(adapter, ranges)
+    fp = TradeOffCurve.sample_grid(resolution)
+    shape = tuple(len(values) for values in lattice.values())
+    if not shape or int(np.prod(shape)) * fp.size * fp.itemsize > max_bytes:
+        return None
+
+    points = [_actual_kwargs(adapter, dict(zip(lattice, point))) for point in itertools.product(*lattice.values())]
+    if not isinstance(adapter.region_computation(**points[0]), TradeOffCurve):
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    name = adapter.__name__
+    path = os.path.join(directory, f"{name}.npy")
+    tmp_path = os.path.join(directory, f"{name}.tmp.npy")
+
+    curves = open_memmap(tmp_path, mode='w+', dtype=float, shape=shape + fp.shape)
+    rows = curves.reshape(-1, fp.size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tabulated = executor.map(_tabulate, itertools.repeat(adapter), points, itertools.repeat(fp),
+                                 chunksize=_CHUNKSIZE)
+        for idx, row in enumerate(tabulated):
+            rows[idx] = row
+    curves.flush()
+    del rows, curves
+
+    np.save(os.path.join(directory, f"{name}_fp.npy"), fp)
+    with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as meta_file:
+        json.dump({
+            "lattice": {param: values.tolist() for param, values in lattice.items()},
+            "logscale": {param: adapter.params_are_logscale()[param] for param in lattice}
+        }, meta_file)
+    # Only complete tables are ever loaded
+    os.replace(tmp_path, path)
+    _tables.pop(name, None)
+
+    return path
+
+
+def _actual_kwargs(adapter: type, slider_vals: Dict[str, float]) -> Dict[str, Any]:
+    kwargs = {}
+    for param, value in slider_vals.items():
+        if adapter.params_are_logscale()[param]:
+            value = 10 ** value
+        kwargs[param] = int(round(value)) if adapter.params_are_integers()[param] else float(value)
+
+    return kwargs
+
+
+def _tabulate(adapter: type, kwargs: Dict[str, Any], fp: np.ndarray) -> np.ndarray:
+    return adapter.region_computation(**kwargs).evaluate(fp)
+
+
+def _parse_ranges(specs: List[str], adapter: type) -> Dict[str, Tuple[float, float]]:
+    ranges = {}
+    for spec in specs:
+        param, bounds = spec.split("=")
+        owner, _, param = param.rpartition(".")
+        if owner and owner != adapter.__name__:
+            continue
+        if param in adapter.params():
+            lo, hi = bounds.split(":")
+            ranges[param] = (float(lo), float(hi))
+
+    return ranges
+
+
+def main(argv: Optional[List[str]] = None):
+    # adapters serves its regions from the tables of this module
+    import adapters
+
+    parser = argparse.ArgumentParser(description="Tabulate the trade-off curves of region adapters.")
+    parser.add_argument("adapters", nargs="*", help="adapter class names, defaults to all adapters")
+    parser.add_argument("-d", "--directory", default=_DEFAULT_DIRECTORY, help="output directory")
+    parser.add_argument("-r", "--range", action="append", default=[],
+                        help="slider range of a parameter, as [Adapter.]param=lo:hi")
+    parser.add_argument("--max-mib", type=float, default=_DEFAULT_MAX_BYTES / 2 ** 20,
+                        help="maximal size of a table, in MiB")
+    parser.add_argument("--resolution", type=int, default=_DEFAULT_RESOLUTION,
+                        help="number of uniformly spaced samples of every curve")
+    parser.add_argument("-j", "--workers", type=int, help="number of worker processes, defaults to the number of CPUs")
+    args = parser.parse_args(argv)
+
+    names = args.adapters or [name for name, cls in vars(adapters).items()
+                              if isinstance(cls, type) and issubclass(cls, adapters.AdaptedRegionComputer)
+                              and cls is not adapters.AdaptedRegionComputer]
+
+    for name in names:
+        adapter = getattr(adapters, name)
+        path = build_lookup_table(adapter,
+                                  args.directory,
+                                  _parse_ranges(args.range, adapter),
+                                  int(args.max_mib * 2 ** 20),
+                                  args.resolution,
+                                  args.workers)
+        print(f"{name}: {path if path is not None else 'skipped'}")
+
+
+if __name__ == "__main__":
+    main()
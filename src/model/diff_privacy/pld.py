@@ -0,0 +1,405 @@
+"""
+Privacy loss distributions (PLD), and their composition by FFT.
+
+The privacy loss of a mechanism between two neighboring datasets is L = log(P(o) / Q(o)) for o ~ P, and its
+distribution determines every (eps, delta(eps)) guarantee of the mechanism:
+
+    delta(eps) = P(L = inf) + E[(1 - exp(eps - L))_+].
+
+Privacy losses add up under composition, so that the PLD of a composition is the convolution of the PLDs of its
+mechanisms. Losses are discretized on a grid of step dx, rounding up, which can only increase delta(eps): the
+resulting guarantees are valid, not approximate.
+"""
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.fft as spfft
+import scipy.special as sps
+
+from tradeoff_curves import TradeOffCurve
+
+_DEFAULT_GRID_STEP = 1e-3
+_DEFAULT_TAIL_MASS = 1e-12
+_MAX_GRID_SIZE = 2 ** 22
+_MAX_DP_FAMILY_SIZE = 2048
+_GRID_TOLERANCE = 1e-9
+
+
+class PrivacyLossDistribution:
+    """
+    Discretized privacy loss distribution: mass pmf[i] at loss (offset + i) * dx, and mass inf_mass at infinity.
+    """
+
+    def __init__(self, pmf: np.ndarray, offset: int, dx: float, inf_mass: float = 0.):
+        """
+        Construct the distribution.
+
+        :param pmf: np.ndarray
+                Masses of the finite losses, on consecutive grid points.
+
+        :param offset: int
+                Grid index of the first finite loss.
+
+        :param dx: float
+                Grid step.
+
+        :param inf_mass: float
+                Probability of an infinite loss, i.e. of an output impossible under the neighboring dataset.
+        """
+        self._pmf = np.asarray(pmf, dtype=float)
+        self._offset = int(offset)
+        self._dx = dx
+        self._inf_mass = min(1., inf_mass)
+
+    def pmf(self) -> np.ndarray:
+        return self._pmf
+
+    def offset(self) -> int:
+        return self._offset
+
+    def dx(self) -> float:
+        return self._dx
+
+    def inf_mass(self) -> float:
+        return self._inf_mass
+
+    def losses(self) -> np.ndarray:
+        return (self._offset + np.arange(len(self._pmf))) * self._dx
+
+    def mean_index(self) -> float:
+        """
+        Mean grid index of the finite losses.
+
+        :return: float
+        """
+        return self._offset + np.dot(np.arange(len(self._pmf)), self._pmf) / np.sum(self._pmf)
+
+    def delta(self, eps: float | np.ndarray) -> np.ndarray:
+        """
+        Smallest delta such that the mechanism is (eps, delta)-DP, for non-negative eps.
+
+        :param eps: float | np.ndarray
+
+        :return: np.ndarray
+        """
+        eps = np.asarray(eps, dtype=float)
+        assert np.all(eps >= 0)
+
+        # delta(eps) = sum_{L > eps} p(L) - exp(eps) sum_{L > eps} p(L) exp(-L), from suffix sums, where only
+        # positive losses ever contribute
+        losses = self.losses()
+        mass_above = np.append(np.cumsum(self._pmf[::-1])[::-1], 0.)
+        weighted = self._pmf * np.exp(-np.maximum(losses, 0.))
+        weighted_above = np.append(np.cumsum(weighted[::-1])[::-1], 0.)
+
+        idx = np.searchsorted(losses, eps, side='right')
+        with np.errstate(over='ignore', invalid='ignore'):
+            delta = mass_above[idx] - np.exp(eps) * weighted_above[idx]
+        # delta(eps) <= P(L > eps), which is used where exp(eps) overflows
+        delta = np.where(np.isfinite(delta), delta, mass_above[idx])
+        return np.clip(delta + self._inf_mass, 0., 1.)
+
+    def dp_family(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (eps, delta(eps)) guarantees at the non-negative grid losses, thinned to at most _MAX_DP_FAMILY_SIZE pairs.
+
+        :return: Tuple[np.ndarray, np.ndarray]
+        """
+        losses = self.losses()
+        eps = np.concatenate(([0.], losses[losses > 0]))
+        if len(eps) > _MAX_DP_FAMILY_SIZE:
+            eps = eps[np.linspace(0, len(eps) - 1, _MAX_DP_FAMILY_SIZE).round().astype(int)]
+
+        return eps, self.delta(eps)
+
+    def tradeoff_curve(self) -> TradeOffCurve:
+        """
+        Trade-off curve of the mechanism, from its (eps, delta(eps)) guarantees. Valid for mechanisms whose PLD is the
+        same for both orders of the neighboring datasets, such as the Laplace, Gaussian and randomized response
+        mechanisms and their compositions.
+
+        :return: TradeOffCurve
+        """
+        return TradeOffCurve.from_dp_family(*self.dp_family())
+
+    def compose(self, other: 'PrivacyLossDistribution') -> 'PrivacyLossDistribution':
+        return compose([self, other])
+
+    def self_compose(self, k: int) -> 'PrivacyLossDistribution':
+        return compose([self], [k])
+
+    @staticmethod
+    def from_losses(
+            losses: Sequence[float] | np.ndarray,
+            probs: Sequence[float] | np.ndarray,
+            dx: float,
+            inf_mass: float = 0.
+    ) -> 'PrivacyLossDistribution':
+        """
+        Discretize a finitely supported privacy loss, rounding losses up to the grid.
+
+        :param losses: Sequence[float] | np.ndarray
+
+        :param probs: Sequence[float] | np.ndarray
+                Probabilities of the losses.
+
+        :param dx: float
+                Grid step.
+
+        :param inf_mass: float
+                Probability of an infinite loss, defaults to 0.
+
+        :return: PrivacyLossDistribution
+        """
+        idx = np.ceil(np.asarray(losses, dtype=float) / dx - _GRID_TOLERANCE).astype(np.int64)
+        offset = idx.min()
+        return PrivacyLossDistribution(np.bincount(idx - offset, weights=probs), offset, dx, inf_mass)
+
+    @staticmethod
+    def from_cdf(
+            cdf: Callable[[np.ndarray], np.ndarray],
+            lower: float,
+            upper: float,
+            dx: float
+    ) -> 'PrivacyLossDistribution':
+        """
+        Discretize a privacy loss given by its cumulative distribution function, rounding losses up to the grid.
+        Losses below lower are rounded up to it, and losses above upper are counted as infinite.
+
+        :param cdf: Callable[[np.ndarray], np.ndarray]
+                P(L <= y), vectorized, whose limit is 1 minus the probability of an infinite loss.
+
+        :param lower: float
+                Smallest loss kept.
+
+        :param upper: float
+                Largest loss kept.
+
+        :param dx: float
+                Grid step.
+
+        :return: PrivacyLossDistribution
+        """
+        first = int(np.ceil(lower / dx - _GRID_TOLERANCE))
+        last = int(np.ceil(upper / dx - _GRID_TOLERANCE))
+        cumulated = cdf(np.arange(first, last + 1) * dx)
+        pmf = np.diff(cumulated, prepend=0.)
+        return PrivacyLossDistribution(pmf, first, dx, max(0., 1 - cumulated[-1]))
+
+
+def compose(
+        plds: Sequence[PrivacyLossDistribution],
+        counts: Optional[Sequence[int]] = None,
+        tail_mass: float = _DEFAULT_TAIL_MASS
+) -> PrivacyLossDistribution:
+    """
+    Compose mechanisms, possibly heterogeneous and each possibly repeated, by a single FFT: the spectrum of every
+    distinct PLD is raised to the power of its count, so that k identical mechanisms cost no more than one.
+
+    The composed losses are only computed on a window around their mean, whose half-width t is set by Hoeffding's
+    inequality so that each tail outside of it has mass at most tail_mass. The circular convolution folds these tails
+    into the window, and the window does not hold them either: tail_mass is therefore added to the infinite loss mass
+    for every truncated side, which keeps delta(eps) an upper bound.
+
+    :param plds: Sequence[PrivacyLossDistribution]
+            PLDs on the same grid.
+
+    :param counts: Optional[Sequence[int]]
+            Number of repetitions of every PLD, defaults to 1 each.
+
+    :param tail_mass: float
+            Bound on the mass of each tail outside of the window, defaults to 1e-12.
+
+    :return: PrivacyLossDistribution
+    """
+    counts = [1] * len(plds) if counts is None else list(counts)
+    dx = plds[0].dx()
+    assert all(np.isclose(pld.dx(), dx) for pld in plds)
+
+    support_lo = sum(k * pld.offset() for pld, k in zip(plds, counts))
+    support_hi = sum(k * (pld.offset() + len(pld.pmf()) - 1) for pld, k in zip(plds, counts))
+    mean = sum(k * pld.mean_index() for pld, k in zip(plds, counts))
+    squared_range = sum(k * (len(pld.pmf()) - 1) ** 2 for pld, k in zip(plds, counts))
+    half_width = np.sqrt(squared_range * np.log(1 / tail_mass) / 2)
+
+    start = max(support_lo, int(np.floor(mean - half_width)))
+    stop = min(support_hi, int(np.ceil(mean + half_width)))
+    size = stop - start + 1
+    n_fft = spfft.next_fast_len(size, real=True)
+
+    spectrum = np.ones(n_fft // 2 + 1, dtype=complex)
+    for pld, k in zip(plds, counts):
+        spectrum *= spfft.rfft(pld.pmf(), n_fft) ** k
+    # Index j of the circular convolution holds the sums support_lo + j modulo n_fft
+    circular = spfft.irfft(spectrum, n_fft)
+    pmf = np.roll(circular, support_lo - start)[:size]
+    np.maximum(pmf, 0., out=pmf)
+
+    no_inf = np.prod([(1 - pld.inf_mass()) ** k for pld, k in zip(plds, counts)])
+    truncated = (start > support_lo) + (stop < support_hi)
+    return PrivacyLossDistribution(pmf, start, dx, 1 - no_inf + truncated * tail_mass)
+
+
+def composition_grid_step(loss_bound: float, k: int, tail_mass: float = _DEFAULT_TAIL_MASS) -> float:
+    """
+    Grid step for composing k mechanisms with losses within [-loss_bound, loss_bound]: the default step, coarsened so
+    that the composition window fits in _MAX_GRID_SIZE points, and adjusted to divide loss_bound, so that the extreme
+    losses are not rounded.
+
+    :param loss_bound: float
+
+    :param k: int
+
+    :param tail_mass: float
+            Bound on the mass of each tail outside of the composition window, defaults to 1e-12.
+
+    :return: float
+    """
+    if loss_bound <= 0:
+        return _DEFAULT_GRID_STEP
+
+    window = 2 * np.sqrt(k * (2 * loss_bound) ** 2 * np.log(1 / tail_mass) / 2)
+    dx = max(_DEFAULT_GRID_STEP, window / _MAX_GRID_SIZE)
+    return loss_bound / np.ceil(loss_bound / dx)
+
+
+def laplace_pld(eps: float, dx: float = _DEFAULT_GRID_STEP) -> PrivacyLossDistribution:
+    """
+    PLD of the Laplace mechanism whose noise scale is the sensitivity over eps. Losses lie in [-eps, eps], with atoms
+    at both ends.
+
+    :param eps: float
+
+    :param dx: float
+            Grid step, defaults to 1e-3.
+
+    :return: PrivacyLossDistribution
+    """
+    def cdf(y: np.ndarray) -> np.ndarray:
+        inside = 0.5 * np.exp(-(eps - np.minimum(y, eps)) / 2)
+        return np.where(y < -eps, 0., np.where(y < eps, inside, 1.))
+
+    return PrivacyLossDistribution.from_cdf(cdf, -eps, eps, dx)
+
+
+def gaussian_pld(
+        mu: float,
+        dx: float = _DEFAULT_GRID_STEP,
+        tail_mass: float = _DEFAULT_TAIL_MASS
+) -> PrivacyLossDistribution:
+    """
+    PLD of the Gaussian mechanism whose shift over noise scale is mu: losses are N(mu^2 / 2, mu^2), truncated to the
+    quantiles of mass tail_mass.
+
+    :param mu: float
+
+    :param dx: float
+            Grid step, defaults to 1e-3.
+
+    :param tail_mass: float
+            Mass of each truncated tail, defaults to 1e-12.
+
+    :return: PrivacyLossDistribution
+    """
+    if mu == 0:
+        return PrivacyLossDistribution.from_losses([0.], [1.], dx)
+
+    mean = mu ** 2 / 2
+    half_width = -sps.ndtri(tail_mass) * mu
+    return PrivacyLossDistribution.from_cdf(lambda y: sps.ndtr((y - mean) / mu),
+                                            mean - half_width, mean + half_width, dx)
+
+
+def randomized_response_pld(eps: float, alphabet_size: int, dx: float = _DEFAULT_GRID_STEP) \
+        -> PrivacyLossDistribution:
+    """
+    PLD of randomized response over alphabet_size symbols: the loss is eps if the symbol of the dataset is kept, -eps
+    if the symbol of its neighbor is output, and 0 otherwise.
+
+    :param eps: float
+
+    :param alphabet_size: int
+
+    :param dx: float
+            Grid step, defaults to 1e-3.
+
+    :return: PrivacyLossDistribution
+    """
+    exp_eps = np.exp(eps)
+    denom = exp_eps + alphabet_size - 1
+    return PrivacyLossDistribution.from_losses([eps, -eps, 0.],
+                                               [exp_eps / denom, 1 / denom, (alphabet_size - 2) / denom], dx)
+
+
+def dp_pld(eps: float, delta: float, dx: float = _DEFAULT_GRID_STEP) -> PrivacyLossDistribution:
+    """
+    PLD of the dominating pair of (eps, delta)-DP mechanisms: composing it gives the exact composition of any such
+    mechanisms.
+
+    :param eps: float
+
+    :param delta: float
+
+    :param dx: float
+            Grid step, defaults to 1e-3.
+
+    :return: PrivacyLossDistribution
+    """
+    exp_eps = np.exp(eps)
+    return PrivacyLossDistribution.from_losses([eps, -eps],
+                                               [(1 - delta) * exp_eps / (1 + exp_eps), (1 - delta) / (1 + exp_eps)],
+                                               dx, delta)
+
+
+def dp_composition_pld(
+        eps_ls: Sequence[float] | np.ndarray,
+        delta_ls: Sequence[float] | np.ndarray,
+        dx: float = _DEFAULT_GRID_STEP
+) -> PrivacyLossDistribution:
+    """
+    PLD of the composition of (eps_i, delta_i)-DP mechanisms, by dynamic programming over the sums of their epsilons.
+
+    Each mechanism is replaced by its dominating pair, whose loss is +eps_i or -eps_i, and eps_i is rounded up to a
+    multiple of dx. The distribution of the sum of the first i losses is then supported on the multiples of dx within
+    [-E_i, E_i], E_i = eps_1 + ... + eps_i, and is obtained from that of the first i - 1 losses by two shifted
+    additions, in O(k * E_k / dx) overall. The result is exact when every eps_i is a multiple of dx, and otherwise
+    bounds delta(eps) from above with the epsilons inflated by at most dx each.
+
+    :param eps_ls: Sequence[float] | np.ndarray
+            Epsilon parameters of the composed mechanisms.
+
+    :param delta_ls: Sequence[float] | np.ndarray
+            Delta parameters of the composed mechanisms.
+
+    :param dx: float
+            Grid step, the precision of the epsilons, defaults to 1e-3.
+
+    :return: PrivacyLossDistribution
+    """
+    eps_ls = np.asarray(eps_ls, dtype=float)
+    delta_ls = np.asarray(delta_ls, dtype=float)
+    assert eps_ls.shape == delta_ls.shape
+    assert np.all(eps_ls >= 0)
+    assert np.all((0 <= delta_ls) & (delta_ls <= 1))
+
+    steps = np.ceil(eps_ls / dx - _GRID_TOLERANCE).astype(np.int64)
+    # Conditionally on no failure, the loss of a mechanism is +eps_i with probability e^eps_i / (1 + e^eps_i)
+    probs_up = sps.expit(eps_ls)
+
+    # pmf[j] is the mass of the loss (j - total) * dx, where total is the sum of the steps so far. The buffers are
+    # allocated once, at their final size, and the distribution alternates between the first two
+    size = 2 * int(steps.sum()) + 1
+    pmf, composed, shifted = np.zeros(size), np.zeros(size), np.empty(size)
+    pmf[0] = 1.
+    total = 0
+    for step, prob_up in zip(steps, probs_up):
+        length = 2 * total + 1
+        np.multiply(pmf[:length], 1 - prob_up, out=composed[:length])
+        composed[length:length + 2 * step] = 0.
+        np.multiply(pmf[:length], prob_up, out=shifted[:length])
+        composed[2 * step:length + 2 * step] += shifted[:length]
+        pmf, composed = composed, pmf
+        total += step
+
+    no_failure = np.prod(1 - delta_ls)
+    return PrivacyLossDistribution(no_failure * pmf[:2 * total + 1], -total, dx, 1 - no_failure)
@@ -0,0 +1,180 @@
+"""
+Rényi differential privacy (RDP), evaluated over an array of orders.
+
+A mechanism is (alpha, rho(alpha))-RDP when the Rényi divergence of order alpha between its output distributions on
+any two neighboring datasets is at most rho(alpha). RDP composes additively, order by order, so that accounting for a
+composition costs O(#orders) whatever its length. The guarantees are converted to (eps, delta)-DP with the conversion
+of Canonne, Kamath and Steinke (2020):
+
+    delta(eps) = min_alpha exp((alpha - 1) (rho(alpha) - eps)) / (alpha - 1) * (1 - 1 / alpha)^alpha,
+
+which is valid but, unlike privacy loss distributions, not tight.
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from tradeoff_curves import TradeOffCurve
+
+# Orders alpha = 1 + 10^-3, ..., 1 + 10^4
+DEFAULT_ORDERS = 1 + np.geomspace(1e-3, 1e4, 1000)
+_MIN_DELTA = 1e-15
+_DP_FAMILY_SIZE = 512
+
+
+class RenyiDP:
+    """
+    RDP guarantees of a mechanism: divergence bound rdp[i] at order orders[i].
+    """
+
+    def __init__(self, orders: np.ndarray, rdp: np.ndarray):
+        """
+        Construct the guarantees.
+
+        :param orders: np.ndarray
+                Orders, greater than 1.
+
+        :param rdp: np.ndarray
+                Rényi divergence bounds at the orders, possibly inf.
+        """
+        self._orders = np.asarray(orders, dtype=float)
+        self._rdp = np.asarray(rdp, dtype=float)
+
+        assert self._orders.ndim == 1 and self._orders.shape == self._rdp.shape
+        assert np.all(self._orders > 1)
+
+    def orders(self) -> np.ndarray:
+        return self._orders
+
+    def rdp(self) -> np.ndarray:
+        return self._rdp
+
+    def delta(self, eps: float | np.ndarray) -> np.ndarray:
+        """
+        Smallest delta guaranteed by any order such that the mechanism is (eps, delta)-DP.
+
+        :param eps: float | np.ndarray
+
+        :return: np.ndarray
+        """
+        eps = np.asarray(eps, dtype=float)
+        alpha = self._orders
+        # log delta for every (eps, order) pair, along a trailing axis of orders
+        log_delta = (alpha - 1) * (self._rdp - eps[..., np.newaxis]) + alpha * np.log1p(-1 / alpha) - np.log(alpha - 1)
+        return np.exp(np.minimum(np.min(log_delta, axis=-1), 0.))
+
+    def eps(self, delta: float | np.ndarray) -> np.ndarray:
+        """
+        Smallest eps guaranteed by any order such that the mechanism is (eps, delta)-DP.
+
+        :param delta: float | np.ndarray
+                Delta(s), in (0, 1].
+
+        :return: np.ndarray
+        """
+        delta = np.asarray(delta, dtype=float)
+        alpha = self._orders
+        eps = self._rdp + np.log1p(-1 / alpha) - (np.log(delta[..., np.newaxis]) + np.log(alpha)) / (alpha - 1)
+        return np.maximum(np.min(eps, axis=-1), 0.)
+
+    def dp_family(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (eps, delta(eps)) guarantees on a grid of _DP_FAMILY_SIZE epsilons, up to the one of delta _MIN_DELTA.
+
+        :return: Tuple[np.ndarray, np.ndarray]
+        """
+        eps = np.linspace(0., float(self.eps(_MIN_DELTA)), _DP_FAMILY_SIZE)
+        return eps, self.delta(eps)
+
+    def tradeoff_curve(self) -> TradeOffCurve:
+        """
+        Trade-off curve implied by the (eps, delta(eps)) guarantees. Valid for mechanisms whose guarantees hold for
+        both orders of the neighboring datasets, such as the Laplace, Gaussian and randomized response mechanisms and
+        their compositions.
+
+        :return: TradeOffCurve
+        """
+        return TradeOffCurve.from_dp_family(*self.dp_family())
+
+    def compose(self, other: 'RenyiDP') -> 'RenyiDP':
+        return compose([self, other])
+
+    def self_compose(self, k: int) -> 'RenyiDP':
+        return compose([self], [k])
+
+
+def compose(rdps: Sequence[RenyiDP], counts: Optional[Sequence[int]] = None) -> RenyiDP:
+    """
+    Compose mechanisms, possibly heterogeneous and each possibly repeated, by adding their guarantees order by order.
+
+    :param rdps: Sequence[RenyiDP]
+            RDP guarantees over the same orders.
+
+    :param counts: Optional[Sequence[int]]
+            Number of repetitions of every mechanism, defaults to 1 each.
+
+    :return: RenyiDP
+    """
+    counts = [1] * len(rdps) if counts is None else list(counts)
+    orders = rdps[0].orders()
+    assert all(np.array_equal(rdp.orders(), orders) for rdp in rdps)
+
+    return RenyiDP(orders, sum(k * rdp.rdp() for rdp, k in zip(rdps, counts)))
+
+
+def gaussian_rdp(mu: float, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+    """
+    RDP of the Gaussian mechanism whose shift over noise scale is mu: rho(alpha) = alpha mu^2 / 2.
+
+    :param mu: float
+
+    :param orders: np.ndarray
+            Orders, defaults to DEFAULT_ORDERS.
+
+    :return: RenyiDP
+    """
+    return RenyiDP(orders, orders * mu ** 2 / 2)
+
+
+def laplace_rdp(eps: float, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+    """
+    RDP of the Laplace mechanism whose noise scale is the sensitivity over eps (Mironov, 2017):
+
+        rho(alpha) = log(alpha / (2 alpha - 1) e^((alpha - 1) eps) + (alpha - 1) / (2 alpha - 1) e^(-alpha eps))
+                     / (alpha - 1),
+
+    computed in log space, so that large orders and epsilons do not overflow.
+
+    :param eps: float
+
+    :param orders: np.ndarray
+            Orders, defaults to DEFAULT_ORDERS.
+
+    :return: RenyiDP
+    """
+    log_norm = np.log(2 * orders - 1)
+    log_sum = np.logaddexp(np.log(orders) - log_norm + (orders - 1) * eps,
+                           np.log(orders - 1) - log_norm - orders * eps)
+    return RenyiDP(orders, log_sum / (orders - 1))
+
+
+def randomized_response_rdp(eps: float, alphabet_size: int, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+    """
+    RDP of randomized response over alphabet_size symbols, between the output distributions of two distinct symbols:
+
+        rho(alpha) = log((e^(alpha eps) + e^((1 - alpha) eps) + alphabet_size - 2) / (e^eps + alphabet_size - 1))
+                     / (alpha - 1).
+
+    :param eps: float
+
+    :param alphabet_size: int
+
+    :param orders: np.ndarray
+            Orders, defaults to DEFAULT_ORDERS.
+
+    :return: RenyiDP
+    """
+    with np.errstate(divide='ignore'):
+        log_others = np.log(alphabet_size - 2.)
+    log_sum = np.logaddexp(np.logaddexp(orders * eps, (1 - orders) * eps), log_others)
+    return RenyiDP(orders, (log_sum - np.logaddexp(eps, np.log(alphabet_size - 1.))) / (orders - 1))
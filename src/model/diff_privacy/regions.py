@@ -1,11 +1,13 @@
-from math import ceil
-
 import scipy.special as sps
 import scipy.stats as stats
 import numpy as np
 
 from definitions import Region, TradeOffFunction, SUM_LINE
-from typing import List
+from functools import lru_cache
+from pld import PrivacyLossDistribution, compose, dp_composition_pld
+from rdp import RenyiDP, compose as compose_rdp
+from tradeoff_curves import TradeOffCurve
+from typing import List, Optional, Sequence, Tuple
 
 
 def intersect_regions(regions: List[Region]) -> Region:
@@ -16,8 +18,11 @@ def intersect_regions(regions: List[Region]) -> Region:
             List of regions.
 
     :return: Region
-            Intersection of the given regions.
+            Intersection of the given regions. If all regions are trade-off curves, so is their intersection.
     """
+    if regions and all(isinstance(region, TradeOffCurve) for region in regions):
+        return TradeOffCurve.intersect(regions)
+
     ret = []
     for region in regions:
         ret.extend(region)
@@ -40,11 +45,23 @@ def region_from_dp_params(eps: float, delta: float) -> Region:
     assert eps >= 0
     assert delta >= 0
 
-    exp = np.exp(eps)
-    ineq = lambda fp, fn: fp + exp * fn >= 1 - delta
-    reverse_ineq = lambda fp, fn: ineq(fn, fp)
+    return tradeoff_eps_delta_dp(eps, delta)
+
+def region_from_dp_params_family(eps_ls: List[float] | np.ndarray, delta_ls: List[float] | np.ndarray) -> Region:
+    """
+    Define the privacy region of a mechanism that is (eps_i, delta_i)-differentially private for every given pair, i.e.
+    the intersection of the corresponding differential privacy regions, as a single constraint.
+
+    :param eps_ls: List[float] | np.ndarray
+            Epsilon parameters of the differential privacy regions.
 
-    return [ineq, reverse_ineq, SUM_LINE]
+    :param delta_ls: List[float] | np.ndarray
+            Delta parameters of the differential privacy regions.
+
+    :return: Region
+            List of constraints defining the privacy region.
+    """
+    return tradeoff_eps_delta_dp_family(eps_ls, delta_ls)
 
 def region_from_dp_tv_params(eps: float, delta: float, eta: float):
     """
@@ -62,8 +79,7 @@ def region_from_dp_tv_params(eps: float, delta: float, eta: float):
     :return: Region
             List of constraints defining the privacy region.
     """
-    tv_constraint = lambda fp, fn: fp + fn >= 1 - eta
-    return intersect_regions([region_from_dp_params(eps, delta), [tv_constraint]])
+    return tradeoff_eps_delta_dp_total_var(eps, delta, eta)
 
 def region_from_dp_composition_basic(eps: float, delta: float, k: int) -> Region:
     """
@@ -106,19 +122,47 @@ def region_from_dp_composition_exact(eps: float, delta: float, k: int) -> Region
     :return: Region
             List of constraints defining the privacy region.
     """
+    return region_from_dp_params_family(*dp_composition_exact_params(eps, delta, k))
+
+def dp_composition_exact_params(eps: float, delta: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the floor(k/2)+1 (eps', delta') pairs of the exact composition theorem in a single batched pass.
+
+    Every quantity is handled in log-space (log-binomials and cumulative log-sum-exp over l < i), so that the
+    computation neither overflows for large eps * k nor loops over the pairs in Python.
+
+    :param eps: float
+            Epsilon parameter of the differentially private mechanisms being composed.
+
+    :param delta: float
+            Delta parameter of the differentially private mechanisms being composed.
+
+    :param k: int
+            Number of composed mechanisms.
+
+    :return: Tuple[np.ndarray, np.ndarray]
+            Epsilon and delta parameters of the composed mechanism, indexed by i = 0, ..., floor(k/2).
+    """
     assert eps >= 0
     assert 0 <= delta <= 1
     assert k >= 0
 
-    constraints = []
-    for i in range(int(np.floor(k/2)+1)):
-        eps_prime = (k - 2 * i) * eps
-        delta_tmp = sum([sps.comb(k, l) * (np.exp((k-l) * eps) - np.exp((k-2*i+l) * eps)) for l in range(i)])
-        delta_tmp /= (1+np.exp(eps)) ** k
-        delta_prime = 1 - ((1 - delta) ** k) * (1 - delta_tmp)
-        constraints.append(region_from_dp_params(eps_prime, delta_prime))
+    k = int(k)
+    i = np.arange(k // 2 + 1)
+    log_binom = sps.gammaln(k + 1) - sps.gammaln(i + 1) - sps.gammaln(k - i + 1)
+    log_norm = k * np.logaddexp(0, eps)
+
+    # Prefix sums over l < i of C(k, l) e^{(k-l) eps} / (1+e^eps)^k and of C(k, l) e^{l eps} / (1+e^eps)^k
+    log_upper = np.concatenate(([-np.inf], np.logaddexp.accumulate(log_binom + (k - i) * eps - log_norm)))[:-1]
+    log_lower = np.concatenate(([-np.inf], np.logaddexp.accumulate(log_binom + i * eps - log_norm)))[:-1]
 
-    return intersect_regions(constraints)
+    eps_prime = (k - 2 * i) * eps
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_ratio = np.minimum(0., log_lower + eps_prime - log_upper)
+        delta_tmp = np.where(np.isneginf(log_upper), 0., -np.exp(log_upper) * np.expm1(log_ratio))
+        delta_prime = -np.expm1(sps.xlog1py(k, -delta) + np.log1p(-np.clip(delta_tmp, 0., 1.)))
+
+    return eps_prime, np.clip(delta_prime, 0., 1.)
 
 def region_from_dp_composition_simplified(
         eps_ls: List[float] | np.ndarray,
@@ -154,6 +198,52 @@ def region_from_dp_composition_simplified(
 
     return region_from_dp_params(min(eps_opt1, eps_opt2, eps_opt3), delta)
 
+def region_from_dp_composition_heterogeneous(
+        eps_ls: List[float] | np.ndarray,
+        delta_ls: List[float] | np.ndarray,
+        precision: float = 1e-3
+) -> Region:
+    """
+    Compute the differential privacy composition region of differentially private mechanisms with different
+    parameters, optimal up to rounding every epsilon up to a multiple of the precision.
+
+    :param eps_ls: List[float] | np.ndarray
+            Epsilon parameters of the differentially private mechanisms being composed.
+
+    :param delta_ls: List[float] | np.ndarray
+            Delta parameters of the differentially private mechanisms being composed.
+
+    :param precision: float
+            Precision of the epsilon parameters, the cost being proportional to sum(eps_ls) / precision per mechanism.
+
+    :return: Region
+            List of constraints defining the privacy region.
+    """
+    return region_from_dp_params_family(*dp_composition_heterogeneous_params(eps_ls, delta_ls, precision))
+
+def dp_composition_heterogeneous_params(
+        eps_ls: List[float] | np.ndarray,
+        delta_ls: List[float] | np.ndarray,
+        precision: float = 1e-3
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute (eps', delta') pairs satisfied by the composition of differentially private mechanisms with different
+    parameters, delta' being the smallest possible for each eps' once the epsilons are rounded up to the precision.
+
+    :param eps_ls: List[float] | np.ndarray
+            Epsilon parameters of the differentially private mechanisms being composed.
+
+    :param delta_ls: List[float] | np.ndarray
+            Delta parameters of the differentially private mechanisms being composed.
+
+    :param precision: float
+            Precision of the epsilon parameters.
+
+    :return: Tuple[np.ndarray, np.ndarray]
+            Epsilon and delta parameters of the composed mechanism.
+    """
+    return dp_composition_pld(eps_ls, delta_ls, precision).dp_family()
+
 def region_from_dp_composition_exact_total_var(
         eps: float,
         delta: float,
@@ -184,37 +274,83 @@ def region_from_dp_composition_exact_total_var(
     :return: Region
             List of constraints defining the privacy region.
     """
+    eps_prime, delta_prime = dp_composition_exact_total_var_params(eps, delta, eta, k)
+    region = region_from_dp_params_family(eps_prime, delta_prime)
+
+    if return_d_tv:
+        return region, delta_prime[0]
+
+    return region
+
+def dp_composition_exact_total_var_params(eps: float, delta: float, eta: float, k: int) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the k+1 (eps', delta') pairs of the composition theorem accounting for the total variation.
+
+    The double sum over (a, l) is reorganised by m = k - a: for every m, the prefix sums over l of
+    C(m, l) e^{(m-l) eps} and C(m, l) e^{l eps} are computed once in log-space and reused for every j < m.
+    This takes O(k^2) time and O(k) memory.
+
+    :param eps: float
+            Epsilon parameter of the differentially private mechanisms being composed.
+
+    :param delta: float
+            Delta parameter of the differentially private mechanisms being composed.
+
+    :param eta: float
+            Total variation of the considered mechanisms.
+
+    :param k: int
+            Number of composed mechanisms.
+
+    :return: Tuple[np.ndarray, np.ndarray]
+            Epsilon and delta parameters of the composed mechanism, indexed by j = 0, ..., k. The delta parameter
+            for j = 0 is an upper bound on the total variation of the composed mechanism.
+    """
     assert eps >= 0
     assert delta >= 0
     assert k >= 0
 
-    alpha = 1 - (eta - delta) * (1 + np.exp(eps)) / ((1 - delta) * (np.exp(eps) - 1))
-
-    constraints = []
-    d_tv = 1
-    for j in range(k+1):
-        eps_prime = j * eps
-        delta_tmp = sum(
-            [ sps.comb(k, a) * sum(
-                [
-                    sps.comb(k-a, l) * (((1-alpha)/(1+np.exp(eps))) ** (k-a)) * \
-                    (alpha ** a) * (np.exp((k-l-a)*eps) - np.exp((l+j)*eps))
-                    for l in range(ceil((k-j-a)/2.))
-                ]
-            )
-                for a in range(k-j)
-              ]
-        )
-        delta_prime = max(0., 1 - ((1 - delta) ** k) * (1 - delta_tmp))
-        constraints.append(region_from_dp_params(eps_prime, delta_prime))
-
-        if j == 0:
-            d_tv = delta_prime
-
-    if return_d_tv:
-        return intersect_regions(constraints), d_tv
-
-    return intersect_regions(constraints)
+    k = int(k)
+    # A mechanism of total variation eta < delta is already (eps, eta)-DP, which keeps alpha <= 1 and q >= 0 instead
+    # of a catastrophically cancelling signed sum
+    delta = min(delta, eta)
+    # A total variation above the largest one of (eps, delta)-DP mechanisms, (e^eps - 1 + 2 delta) / (e^eps + 1), is
+    # vacuous: alpha is then clamped to 0, which yields the exact composition instead of an overflowing signed sum
+    alpha = max(0., 1 - (eta - delta) * (1 + np.exp(eps)) / ((1 - delta) * (np.exp(eps) - 1)))
+    q = (1 - alpha) / (1 + np.exp(eps))
+
+    # Weights C(k, m) q^m alpha^(k-m) of the outer sum, which may be signed
+    m = np.arange(k + 1)
+    log_binom = sps.gammaln(k + 1) - sps.gammaln(m + 1) - sps.gammaln(k - m + 1)
+    with np.errstate(divide="ignore"):
+        log_weights = log_binom + sps.xlogy(m, np.abs(q)) + sps.xlogy(k - m, np.abs(alpha))
+    signs = np.where((m % 2 == 1) & (q < 0), -1., 1.) * np.where(((k - m) % 2 == 1) & (alpha < 0), -1., 1.)
+
+    delta_tmp = np.zeros(k + 1)
+    j = np.arange(k + 1)
+    with np.errstate(over="ignore", invalid="ignore"):
+        for row in range(1, k + 1):
+            if np.isneginf(log_weights[row]):
+                continue
+
+            l = np.arange((row + 1) // 2)
+            log_binom_row = sps.gammaln(row + 1) - sps.gammaln(l + 1) - sps.gammaln(row - l + 1)
+            log_upper = np.logaddexp.accumulate(log_binom_row + (row - l) * eps)
+            log_lower = np.logaddexp.accumulate(log_binom_row + l * eps)
+
+            last_l = (row - j[:row] + 1) // 2 - 1
+            log_upper_j = log_upper[last_l]
+            delta_tmp[:row] += signs[row] * np.exp(log_weights[row] + log_upper_j) * \
+                -np.expm1(np.minimum(0., j[:row] * eps + log_lower[last_l] - log_upper_j))
+
+    log_no_delta = sps.xlog1py(k, -delta)
+    delta_prime = np.maximum(0., -np.expm1(log_no_delta) + np.exp(log_no_delta) * delta_tmp)
+    # Cancellations of the signed sum that did not survive floating point only yield the trivial guarantee
+    delta_prime = np.where(np.isfinite(delta_tmp), delta_prime, 1.)
+    assert np.all(np.isfinite(delta_prime))
+
+    return j * eps, np.clip(delta_prime, 0., 1.)
 
 def region_from_f_dp(f: TradeOffFunction) -> Region:
     """
@@ -224,8 +360,11 @@ def region_from_f_dp(f: TradeOffFunction) -> Region:
             Function that outputs the best false negative rate for a given false positive rate.
 
     :return: Region
-            List of constraints defining the privacy region, above f.
+            List of constraints defining the privacy region, above f. If f is a TradeOffCurve, the curve itself.
     """
+    if isinstance(f, TradeOffCurve):
+        return f
+
     main_region = lambda fp, fn: fn >= f(fp)
 
     return [SUM_LINE, main_region]
@@ -240,7 +379,7 @@ def tradeoff_eps_delta_dp(eps: float, delta: float) -> TradeOffFunction:
 
     :return: TradeOffFunction
     """
-    return lambda fp: np.maximum(np.maximum(0, 1 - delta - np.exp(eps) * fp), np.exp(-eps) * (1 - delta - fp))
+    return TradeOffCurve.from_dp_family([eps], [delta])
 
 def tradeoff_eps_delta_dp_total_var(eps, delta, eta) -> TradeOffFunction:
     """
@@ -254,12 +393,26 @@ def tradeoff_eps_delta_dp_total_var(eps, delta, eta) -> TradeOffFunction:
 
     :return: TradeOffFunction
     """
-    return lambda fp: np.maximum(1 - fp - eta,
-        np.maximum(
-            np.maximum(0, 1 - delta - np.exp(eps) * fp),
-            np.exp(-eps) * (1 - delta - fp)
-        )
-    )
+    return TradeOffCurve.intersect([
+        TradeOffCurve.from_dp_family([eps], [delta]),
+        TradeOffCurve.from_lines([1 - eta], [-1])
+    ])
+
+def tradeoff_eps_delta_dp_family(eps_ls: List[float] | np.ndarray, delta_ls: List[float] | np.ndarray) \
+        -> TradeOffFunction:
+    """
+    Return the trade-off function of a mechanism that is (eps_i, delta_i)-DP for every given pair.
+
+    The trade-off function is the upper envelope of the 2n lines defining the DP regions: its breakpoints are computed
+    once, so that evaluating it costs a single interpolation regardless of the number of pairs.
+
+    :param eps_ls: List[float] | np.ndarray
+
+    :param delta_ls: List[float] | np.ndarray
+
+    :return: TradeOffFunction
+    """
+    return TradeOffCurve.from_dp_family(eps_ls, delta_ls)
 
 
 def region_from_gaussian_dp(mu: float) -> Region:
@@ -272,7 +425,35 @@ def region_from_gaussian_dp(mu: float) -> Region:
     :return: Region
             List of constraints defining the Gaussian-DP privacy region, above the Gaussian trade-off function.
     """
-    return region_from_f_dp(lambda fp: stats.norm.cdf(stats.norm.ppf(1 - fp) - mu))
+    return region_from_f_dp(tradeoff_gaussian_dp(mu))
+
+def tradeoff_gaussian_dp(mu: float) -> TradeOffFunction:
+    """
+    Return the trade-off function of mu-Gaussian DP, fn = Phi(Phi^-1(1 - fp) - mu), sampled at the shared sample grid.
+
+    :param mu: float
+
+    :return: TradeOffFunction
+    """
+    fp, isf = standard_normal_isf()
+    fn = np.subtract(isf, mu)
+    sps.ndtr(fn, out=fn)
+    return TradeOffCurve(fp, np.minimum(fn, 1 - fp, out=fn))
+
+@lru_cache(maxsize=None)
+def standard_normal_isf() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse survival function of the standard normal, Phi^-1(1 - fp), at the sample grid of trade-off curves.
+    It does not depend on the parameters of Gaussian-family trade-off functions, so it is computed once and shared
+    by all of them.
+
+    :return: Tuple[np.ndarray, np.ndarray]
+            Read-only sample grid and inverse survival function at its points.
+    """
+    fp = TradeOffCurve.sample_grid()
+    isf = -sps.ndtri(fp)
+    isf.setflags(write=False)
+    return fp, isf
 
 def region_from_gaussian_dp_composition(mu_ls: List[float] | np.ndarray) -> Region:
     """
@@ -286,3 +467,38 @@ def region_from_gaussian_dp_composition(mu_ls: List[float] | np.ndarray) -> Regi
     """
     return region_from_gaussian_dp(float(np.linalg.norm(np.array(mu_ls))))
 
+def region_from_pld_composition(
+        plds: Sequence[PrivacyLossDistribution],
+        counts: Optional[Sequence[int]] = None
+) -> Region:
+    """
+    Compute the privacy region of a composition of mechanisms from their privacy loss distributions.
+
+    :param plds: Sequence[PrivacyLossDistribution]
+            Privacy loss distributions of the composed mechanisms, on the same grid.
+
+    :param counts: Optional[Sequence[int]]
+            Number of repetitions of every mechanism, defaults to 1 each.
+
+    :return: Region
+            Trade-off curve of the composition.
+    """
+    return region_from_f_dp(compose(plds, counts).tradeoff_curve())
+
+def region_from_rdp_composition(
+        rdps: Sequence[RenyiDP],
+        counts: Optional[Sequence[int]] = None
+) -> Region:
+    """
+    Compute the privacy region of a composition of mechanisms from their Rényi differential privacy guarantees.
+
+    :param rdps: Sequence[RenyiDP]
+            Rényi differential privacy guarantees of the composed mechanisms, over the same orders.
+
+    :param counts: Optional[Sequence[int]]
+            Number of repetitions of every mechanism, defaults to 1 each.
+
+    :return: Region
+            Trade-off curve of the composition.
+    """
+    return region_from_f_dp(compose_rdp(rdps, counts).tradeoff_curve())
@@ -0,0 +1,231 @@
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from definitions import TradeOffFunction, SUM_LINE
+
+_DEFAULT_RESOLUTION = 1025
+_MAX_LOG_SLOPE = 700.
+
+
+class TradeOffCurve(Sequence):
+    """
+    Convex, piecewise-linear trade-off function fn = f(fp) on [0, 1], stored through its breakpoints.
+
+    A curve is also a Region: iterating over it yields the constraints [SUM_LINE, fn >= f(fp)], so that it can be
+    used wherever a list of constraints is expected.
+    """
+
+    def __init__(self, fp: np.ndarray, fn: np.ndarray):
+        """
+        Construct the curve from its breakpoints.
+
+        :param fp: np.ndarray
+                Increasing false positive rates of the breakpoints, from 0 to 1.
+
+        :param fn: np.ndarray
+                False negative rates of the breakpoints.
+        """
+        self._fp = np.asarray(fp, dtype=float)
+        self._fn = np.asarray(fn, dtype=float)
+
+        assert self._fp.ndim == 1 and self._fp.shape == self._fn.shape
+        assert self._fp[0] == 0 and self._fp[-1] == 1
+
+        self._constraints = [SUM_LINE, lambda fp, fn: fn >= self.evaluate(fp)]
+
+    def breakpoints(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Breakpoints of the curve.
+
+        :return: Tuple[np.ndarray, np.ndarray]
+                False positive and false negative rates of the breakpoints.
+        """
+        return self._fp, self._fn
+
+    def evaluate(self, fp: float | np.ndarray) -> np.ndarray:
+        """
+        Evaluate the curve by linear interpolation between its breakpoints.
+
+        :param fp: float | np.ndarray
+                False positive rate(s), of any shape.
+
+        :return: np.ndarray
+                Corresponding false negative rate(s).
+        """
+        return np.interp(fp, self._fp, self._fn)
+
+    def area(self) -> float:
+        """
+        Exact area of the privacy region, above the curve and below the line fp + fn = 1.
+
+        :return: float
+        """
+        return float(0.5 - np.sum((self._fn[1:] + self._fn[:-1]) * np.diff(self._fp)) / 2)
+
+    def __call__(self, fp: float | np.ndarray) -> np.ndarray:
+        return self.evaluate(fp)
+
+    def __getitem__(self, idx):
+        return self._constraints[idx]
+
+    def __len__(self) -> int:
+        return len(self._constraints)
+
+    @staticmethod
+    def from_function(f: TradeOffFunction, resolution: int = _DEFAULT_RESOLUTION) -> 'TradeOffCurve':
+        """
+        Sample a trade-off function, more densely close to fp = 0 and fp = 1 where it is usually steep.
+
+        :param f: TradeOffFunction
+                Vectorized trade-off function.
+
+        :param resolution: int
+                Number of uniformly spaced samples, defaults to 1025.
+
+        :return: TradeOffCurve
+        """
+        if isinstance(f, TradeOffCurve):
+            return f
+
+        fp = TradeOffCurve.sample_grid(resolution)
+        return TradeOffCurve(fp, np.clip(f(fp), 0, 1 - fp))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def sample_grid(resolution: int = _DEFAULT_RESOLUTION) -> np.ndarray:
+        """
+        False positive rates at which trade-off functions are sampled, uniformly spaced and denser close to fp = 0
+        and fp = 1. The grid is computed once per resolution and shared, hence read-only.
+
+        :param resolution: int
+                Number of uniformly spaced samples, defaults to 1025.
+
+        :return: np.ndarray
+        """
+        tails = np.geomspace(1e-9, 0.5, resolution // 4)
+        fp = np.unique(np.concatenate((np.linspace(0, 1, resolution), tails, 1 - tails)))
+        fp.setflags(write=False)
+        return fp
+
+    @staticmethod
+    def from_lines(intercepts: List[float] | np.ndarray, slopes: List[float] | np.ndarray) -> 'TradeOffCurve':
+        """
+        Build the curve fn = max(0, max_i intercepts[i] + slopes[i] * fp).
+
+        :param intercepts: List[float] | np.ndarray
+
+        :param slopes: List[float] | np.ndarray
+
+        :return: TradeOffCurve
+        """
+        intercepts = np.concatenate((np.asarray(intercepts, dtype=float), [0.]))
+        slopes = np.concatenate((np.asarray(slopes, dtype=float), [0.]))
+        return TradeOffCurve(*_upper_envelope(intercepts, slopes))
+
+    @staticmethod
+    def from_dp_family(eps_ls: List[float] | np.ndarray, delta_ls: List[float] | np.ndarray) -> 'TradeOffCurve':
+        """
+        Build the trade-off curve of a mechanism that is (eps_i, delta_i)-DP for every given pair.
+
+        :param eps_ls: List[float] | np.ndarray
+
+        :param delta_ls: List[float] | np.ndarray
+
+        :return: TradeOffCurve
+        """
+        # Slopes steeper than exp(_MAX_LOG_SLOPE) are indistinguishable from vertical lines on [0, 1]
+        eps_ls = np.minimum(np.asarray(eps_ls, dtype=float), _MAX_LOG_SLOPE)
+        delta_ls = np.asarray(delta_ls, dtype=float)
+        exp_eps = np.exp(eps_ls)
+
+        return TradeOffCurve.from_lines(
+            np.concatenate((1 - delta_ls, (1 - delta_ls) / exp_eps)),
+            np.concatenate((-exp_eps, -1 / exp_eps))
+        )
+
+    @staticmethod
+    def intersect(curves: List['TradeOffCurve']) -> 'TradeOffCurve':
+        """
+        Intersect the regions above the given curves, i.e. compute their pointwise maximum.
+
+        :param curves: List[TradeOffCurve]
+
+        :return: TradeOffCurve
+        """
+        assert len(curves) > 0
+
+        fp = np.unique(np.concatenate([curve._fp for curve in curves]))
+        values = np.stack([curve.evaluate(fp) for curve in curves])
+
+        # Every curve is linear between two consecutive points: add the crossings of the maximal curves
+        while True:
+            top = values.argmax(axis=0)
+            left = np.nonzero(top[:-1] != top[1:])[0]
+            left = left[fp[left + 1] - fp[left] > 1e-15]
+            if not left.size:
+                break
+
+            right = left + 1
+            gap_left = values[top[left], left] - values[top[right], left]
+            gap_right = values[top[right], right] - values[top[left], right]
+            weight = gap_left / np.maximum(gap_left + gap_right, np.finfo(float).tiny)
+            crossings = fp[left] + weight * (fp[right] - fp[left])
+            crossings = crossings[(crossings > fp[left]) & (crossings < fp[right])]
+            if not crossings.size:
+                break
+
+            fp = np.concatenate((fp, crossings))
+            order = np.argsort(fp, kind="stable")
+            fp = fp[order]
+            values = np.concatenate((values, np.stack([curve.evaluate(crossings) for curve in curves])), axis=1)
+            values = values[:, order]
+
+        return TradeOffCurve(fp, values.max(axis=0))
+
+
+def _upper_envelope(intercepts: np.ndarray, slopes: np.ndarray, start: float = 0., stop: float = 1.) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the breakpoints of the upper envelope max_i (intercepts[i] + slopes[i] * x) over [start, stop].
+
+    :param intercepts: np.ndarray
+
+    :param slopes: np.ndarray
+
+    :param start: float
+            Left end of the considered interval, defaults to 0.
+
+    :param stop: float
+            Right end of the considered interval, defaults to 1.
+
+    :return: Tuple[np.ndarray, np.ndarray]
+            Abscissas and values of the breakpoints of the envelope, including both ends of the interval.
+    """
+    order = np.lexsort((intercepts, slopes))
+    sorted_b = intercepts[order]
+    sorted_m = slopes[order]
+
+    hull = []
+    for idx in range(len(order)):
+        b, m = sorted_b[idx], sorted_m[idx]
+        if hull and sorted_m[hull[-1]] == m:
+            hull.pop()
+        while len(hull) >= 2:
+            b1, m1 = sorted_b[hull[-2]], sorted_m[hull[-2]]
+            b2, m2 = sorted_b[hull[-1]], sorted_m[hull[-1]]
+            if (b1 - b) * (m2 - m1) <= (b1 - b2) * (m - m1):
+                hull.pop()
+            else:
+                break
+        hull.append(idx)
+
+    hull_b = sorted_b[hull]
+    hull_m = sorted_m[hull]
+    crossings = (hull_b[:-1] - hull_b[1:]) / (hull_m[1:] - hull_m[:-1])
+
+    xs = np.concatenate(([start], crossings[(crossings > start) & (crossings < stop)], [stop]))
+    active = np.searchsorted(crossings, xs)
+    return xs, hull_b[active] + hull_m[active] * xs
@@ -3,7 +3,7 @@ from abc import abstractmethod
 
 from definitions import TradeOffFunction, Region
 from mechanism import Mechanism
-from typing import Any
+from typing import Any, Tuple
 
 
 class AdditiveMechanism(Mechanism):
@@ -47,17 +47,26 @@ class AdditiveMechanism(Mechanism):
         pass
 
     @abstractmethod
-    def generate_noise(self, size) -> np.ndarray:
+    def generate_noise(self, size, n_releases: int | None = None) -> np.ndarray:
         """
-        Generate random noise according to the prescribed distribution.
+        Generate random noise according to the prescribed distribution, from the generator of the mechanism.
 
         :param size: shape of random variables to generate
 
+        :param n_releases: int | None
+                Number of independent releases drawn at once, along a new leading axis, defaults to a single release
+                without that axis.
+
         :return: np.ndarray
                 Random samples from the  prescribed distribution.
         """
         pass
 
+    @staticmethod
+    def _release_shape(size, n_releases: int | None) -> Tuple[int, ...]:
+        shape = tuple(np.atleast_1d(size)) if size is not None else ()
+        return shape if n_releases is None else (n_releases,) + shape
+
     @abstractmethod
     def _shift(self) -> float:
         """
@@ -75,20 +84,45 @@ class AdditiveMechanism(Mechanism):
 
         :return: TradeoffFunction
         """
-        return lambda fp: self.cdf(self.quantile(1 - fp) - self._shift())
+        return self.tradeoff
 
-    def apply(self, x: np.ndarray, *args, **kwargs) -> Any:
+    def tradeoff(self, fp: float | np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Evaluate the tradeoff function T(a) = cdf(quantile(1-a)-shift). Mechanisms whose tradeoff function has a
+        closed form override this generic composition.
+
+        :param fp: float | np.ndarray
+                False positive rate(s).
+
+        :param out: np.ndarray | None
+                Float array of the shape of fp receiving the result, allocated if None.
+
+        :return: np.ndarray
+                False negative rate(s), i.e. out if given.
+        """
+        fn = self.cdf(self.quantile(1 - np.asarray(fp, dtype=float)) - self._shift())
+        if out is None:
+            return fn
+
+        out[...] = fn
+        return out
+
+    def apply(self, x: np.ndarray, n_releases: int | None = None, *args, **kwargs) -> Any:
         """
         Apply additive noise.
 
         :param x: np.ndarray
                 Array to privatize.
 
+        :param n_releases: int | None
+                Number of independent releases of x, stacked along a new leading axis, defaults to a single release.
+
         :param args: unused
 
         :param kwargs: unused
 
         :return: Result.
         """
-        return x + self.generate_noise(x.shape)
+        x = np.asarray(x)
+        return x + self.generate_noise(x.shape, n_releases)
 
@@ -0,0 +1,159 @@
+from typing import Any, Iterator, Tuple
+
+import numpy as np
+
+from definitions import ScoreFunction, SeedLike, TradeOffFunction
+from pld import PrivacyLossDistribution, dp_pld
+from rdp import DEFAULT_ORDERS, RenyiDP, randomized_response_rdp
+from regions import tradeoff_eps_delta_dp
+from mechanism import Mechanism
+
+_DEFAULT_CHUNK_SIZE = 2 ** 20
+
+
+def gumbel_argmax(log_weights: np.ndarray, rng: np.random.Generator) -> int:
+    """
+    Sample an index with probability proportional to exp(log_weights), without ever exponentiating: the argmax of
+    the log-weights perturbed by i.i.d. standard Gumbel noise follows exactly that distribution, and cannot underflow.
+
+    :param log_weights: np.ndarray
+            Unnormalized log-probabilities, possibly -inf.
+
+    :param rng: np.random.Generator
+
+    :return: int
+            Sampled index.
+    """
+    return int(np.argmax(log_weights + rng.gumbel(size=log_weights.shape)))
+
+
+class ExponentialMechanism(Mechanism):
+    """
+    Exponential mechanism: select a candidate c with probability proportional to exp(eps * score(c, x) / (2 * sens)),
+    where sens bounds the change of any score when one data point changes. It is (eps, 0)-DP.
+
+    Candidates are sampled in log space through the Gumbel-max trick, chunk by chunk, so that the scores of large
+    candidate sets never need to be held in memory at once.
+    """
+
+    def __init__(self,
+        eps: float,
+        score_func: ScoreFunction,
+        sensitivity: float,
+        candidates: np.ndarray | int,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        rng: SeedLike = None
+    ):
+        """
+        Construct the mechanism.
+
+        :param eps: float
+                Epsilon parameter of the differentially private mechanism.
+
+        :param score_func: ScoreFunction
+                Vectorized score function, mapping an array of candidates and the data to their scores.
+
+        :param sensitivity: float
+                Sensitivity of the score function.
+
+        :param candidates: np.ndarray | int
+                Candidates, or their number n to select among 0, ..., n-1 without materializing them.
+
+        :param chunk_size: int
+                Number of perturbed scores held at once, defaults to 2^20.
+
+        :param rng: SeedLike
+                Random generator of the mechanism, or seed of a new one, defaults to a freshly seeded generator.
+        """
+        super().__init__(eps, 0, rng)
+        self._score_func = score_func
+        self._sensitivity = sensitivity
+        self._candidates = candidates
+        self._chunk_size = chunk_size
+
+    def apply(self, x: Any, k: int | None = None, n_releases: int | None = None, *args, **kwargs) -> Any:
+        """
+        Select candidates given the data.
+
+        :param x: Any
+                Data, passed as is to the score function.
+
+        :param k: int | None
+                Number of distinct candidates to select at once, defaults to a single candidate. Selecting the top k
+                of the perturbed scores is equivalent to k successive selections without replacement, and is therefore
+                (k * eps, 0)-DP.
+
+        :param n_releases: int | None
+                Number of independent selections, stacked along a new leading axis, defaults to a single selection.
+                Scores are computed once for all of them.
+
+        :param args: unused
+
+        :param kwargs: unused
+
+        :return: Any
+                Selected candidate, or array of the k selected candidates by decreasing perturbed score.
+        """
+        idx = self.select(x, 1 if k is None else k, n_releases)
+        selected = idx if isinstance(self._candidates, (int, np.integer)) else np.asarray(self._candidates)[idx]
+        return selected[..., 0] if k is None else selected
+
+    def select(self, x: Any, k: int = 1, n_releases: int | None = None) -> np.ndarray:
+        """
+        Select the indices of k distinct candidates, in one pass over the chunks of candidates.
+
+        :param x: Any
+                Data, passed as is to the score function.
+
+        :param k: int
+                Number of candidates, defaults to 1.
+
+        :param n_releases: int | None
+                Number of independent selections, stacked along a new leading axis, defaults to a single selection.
+
+        :return: np.ndarray
+                Indices of the selected candidates, by decreasing perturbed score.
+        """
+        scale = self._eps / (2 * self._sensitivity)
+        rows = 1 if n_releases is None else n_releases
+        best_keys = np.empty((rows, 0))
+        best_idx = np.empty((rows, 0), dtype=np.int64)
+
+        for start, chunk in self._chunks(max(1, self._chunk_size // rows)):
+            scores = scale * np.asarray(self._score_func(chunk, x), dtype=float)
+            keys = self._rng.gumbel(size=(rows, len(scores)))
+            keys += scores
+
+            keys = np.concatenate((best_keys, keys), axis=1)
+            chunk_idx = np.broadcast_to(np.arange(start, start + len(chunk)), (rows, len(chunk)))
+            idx = np.concatenate((best_idx, chunk_idx), axis=1)
+            if keys.shape[1] > k:
+                top = np.argpartition(keys, -k, axis=1)[:, -k:]
+                keys, idx = np.take_along_axis(keys, top, axis=1), np.take_along_axis(idx, top, axis=1)
+            best_keys, best_idx = keys, idx
+
+        selected = np.take_along_axis(best_idx, np.argsort(-best_keys, axis=1, kind="stable"), axis=1)
+        return selected[0] if n_releases is None else selected
+
+    def tradeoff_function(self) -> TradeOffFunction:
+        return tradeoff_eps_delta_dp(self._eps, 0)
+
+    def privacy_loss_distribution(self, dx: float) -> PrivacyLossDistribution:
+        # Any (eps, 0)-DP mechanism is dominated by binary randomized response
+        return dp_pld(self._eps, 0, dx)
+
+    def renyi_dp(self, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+        return randomized_response_rdp(self._eps, 2, orders)
+
+    def tv(self) -> float:
+        exp_eps = np.exp(self._eps)
+        return (exp_eps - 1) / (exp_eps + 1)
+
+    def _chunks(self, chunk_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+        if isinstance(self._candidates, (int, np.integer)):
+            for start in range(0, self._candidates, chunk_size):
+                yield start, np.arange(start, min(start + chunk_size, self._candidates))
+        else:
+            candidates = np.asarray(self._candidates)
+            for start in range(0, len(candidates), chunk_size):
+                yield start, candidates[start:start + chunk_size]
@@ -1,4 +1,7 @@
 from additive_mechanism import AdditiveMechanism
+from definitions import SeedLike
+from pld import PrivacyLossDistribution, gaussian_pld
+from rdp import DEFAULT_ORDERS, RenyiDP, gaussian_rdp
 from regions import *
 
 
@@ -7,7 +10,7 @@ class GaussianMechanism(AdditiveMechanism):
     Gaussian mechanism definition.
     """
 
-    def __init__(self, eps: float, delta: float, l2_sens: float):
+    def __init__(self, eps: float, delta: float, l2_sens: float, rng: SeedLike = None):
         """
         Construct the mechanism.
 
@@ -16,8 +19,14 @@ class GaussianMechanism(AdditiveMechanism):
 
         :param delta: float
                 Delta parameter of the differentially private mechanism.
+
+        :param l2_sens: float
+                L2 sensitivity of the protected function.
+
+        :param rng: SeedLike
+                Random generator of the mechanism, or seed of a new one, defaults to a freshly seeded generator.
         """
-        super().__init__(eps, delta)
+        super().__init__(eps, delta, rng)
         self._mu = 0
         self._sigma = 1
         self._shiftval = eps/np.sqrt(2 * np.log(5/(4 * delta)))
@@ -32,6 +41,54 @@ class GaussianMechanism(AdditiveMechanism):
     def _shift(self) -> float:
         return self._shiftval
 
+    def tradeoff_function(self) -> TradeOffFunction:
+        """
+        Gaussian trade-off function T(a) = Phi(Phi^-1(1-a) - shift), sharing its grid-invariant term with all the
+        Gaussian-family regions.
+
+        :return: TradeOffFunction
+        """
+        return tradeoff_gaussian_dp(self._shift() / self._sigma)
+
+    def tradeoff(self, fp: float | np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        return GaussianMechanism.tradeoff_func(fp, self._shift() / self._sigma, out)
+
+    @staticmethod
+    def tradeoff_func(fp: float | np.ndarray, mu: float, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Closed-form tradeoff function between N(0, 1) and N(mu, 1): T(a) = Phi(-Phi^-1(a) - mu).
+
+        Using Phi^-1(a) rather than Phi^-1(1 - a) keeps full precision as a goes to 0, where 1 - a rounds to 1.
+
+        :param fp: float | np.ndarray
+                False positive rate(s).
+
+        :param mu: float
+                Shift between the two normal distributions, in units of their standard deviation.
+
+        :param out: np.ndarray | None
+                Float array of the shape of fp receiving the result, allocated if None.
+
+        :return: np.ndarray
+                False negative rate(s), i.e. out if given.
+        """
+        fp = np.asarray(fp, dtype=float)
+        if out is None:
+            out = np.empty_like(fp)
+
+        sps.ndtri(fp, out=out)
+        np.negative(out, out=out)
+        np.subtract(out, mu, out=out)
+        sps.ndtr(out, out=out)
+
+        return out
+
+    def privacy_loss_distribution(self, dx: float) -> PrivacyLossDistribution:
+        return gaussian_pld(self._shift() / self._sigma, dx)
+
+    def renyi_dp(self, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+        return gaussian_rdp(self._shift() / self._sigma, orders)
+
     def tv(self):
         return 2 * stats.norm.cdf(self._mu / 2) - 1
 
@@ -42,5 +99,5 @@ class GaussianMechanism(AdditiveMechanism):
     def noise_scale_func(eps, delta, l2_sens):
         return np.sqrt(2 * np.log(5 / (4 * delta)) * ((l2_sens / eps) ** 2))
 
-    def generate_noise(self, size) -> np.ndarray:
-        return np.random.normal(loc=0, scale=self.noise_scale(), size=size)
+    def generate_noise(self, size, n_releases: int | None = None) -> np.ndarray:
+        return self._rng.normal(loc=0, scale=self.noise_scale(), size=self._release_shape(size, n_releases))
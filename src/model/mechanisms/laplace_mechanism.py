@@ -1,4 +1,7 @@
 from additive_mechanism import AdditiveMechanism
+from definitions import SeedLike
+from pld import PrivacyLossDistribution, laplace_pld
+from rdp import DEFAULT_ORDERS, RenyiDP, laplace_rdp
 from regions import *
 
 
@@ -7,7 +10,7 @@ class LaplaceMechanism(AdditiveMechanism):
     Laplace mechanism definition.
     """
 
-    def __init__(self, eps: float, l1_sens: float):
+    def __init__(self, eps: float, l1_sens: float, rng: SeedLike = None):
         """
         Construct the mechanism.
 
@@ -17,20 +20,22 @@ class LaplaceMechanism(AdditiveMechanism):
         :param l1_sens: float
                 L1 sensitivity of the protected function.
 
+        :param rng: SeedLike
+                Random generator of the mechanism, or seed of a new one, defaults to a freshly seeded generator.
+
         For the Laplace mechanism, delta = 0.
         """
-        super().__init__(eps, 0)
+        super().__init__(eps, 0, rng)
         self._mu = 0
         self._scale = 1
         self._eps = eps
         self._l1_sens = l1_sens
 
     def quantile(self, alpha: float | np.ndarray) -> np.ndarray:
-        alpha = np.array(alpha)
-        log_arg = 1 - 2 * np.abs(alpha - 0.5)
-        ret = self._mu + np.zeros_like(alpha)
-        ret[log_arg > 0] -= self._scale * np.sign(alpha[log_arg != 0] - 0.5) * np.log(log_arg[log_arg != 0])
-        return ret
+        alpha = np.asarray(alpha, dtype=float)
+        # quantile(0) = -inf and quantile(1) = inf
+        with np.errstate(divide='ignore'):
+            return self._mu - self._scale * np.sign(alpha - 0.5) * np.log1p(-np.abs(2 * alpha - 1))
 
     def cdf(self, alpha: float | np.ndarray) -> np.ndarray:
         alpha = np.array(alpha - self._mu)
@@ -39,9 +44,55 @@ class LaplaceMechanism(AdditiveMechanism):
     def _shift(self) -> float:
         return self._eps
 
+    def privacy_loss_distribution(self, dx: float) -> PrivacyLossDistribution:
+        return laplace_pld(self._shift() / self._scale, dx)
+
+    def renyi_dp(self, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+        return laplace_rdp(self._shift() / self._scale, orders)
+
     def tv(self) -> float:
         return 1-np.exp(-self._eps/2)
 
+    def tradeoff(self, fp: float | np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        return LaplaceMechanism.tradeoff_func(fp, self._shift() / self._scale, out)
+
+    @staticmethod
+    def tradeoff_func(fp: float | np.ndarray, mu: float, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Closed-form tradeoff function between Laplace(0, 1) and Laplace(mu, 1):
+        T(a) = 1 - e^mu a if a < e^-mu / 2, e^-mu / (4a) if e^-mu / 2 <= a <= 1/2, and e^-mu (1 - a) otherwise.
+
+        Every piece is evaluated in place on its own entries, so that neither fp = 0 nor fp = 1 is divided by.
+
+        :param fp: float | np.ndarray
+                False positive rate(s).
+
+        :param mu: float
+                Shift between the two Laplace distributions, in units of their scale.
+
+        :param out: np.ndarray | None
+                Float array of the shape of fp receiving the result, allocated if None.
+
+        :return: np.ndarray
+                False negative rate(s), i.e. out if given.
+        """
+        fp = np.asarray(fp, dtype=float)
+        if out is None:
+            out = np.empty_like(fp)
+
+        exp_mu = np.exp(-mu)
+        low = fp < exp_mu / 2
+        high = fp > 0.5
+        mid = ~(low | high)
+
+        np.multiply(fp, -1 / exp_mu, out=out, where=low)
+        np.add(out, 1, out=out, where=low)
+        np.divide(exp_mu / 4, fp, out=out, where=mid)
+        np.subtract(1, fp, out=out, where=high)
+        np.multiply(out, exp_mu, out=out, where=high)
+
+        return out
+
     def noise_scale(self) -> float:
         """
         Scale b of the Laplacian noise, such that Var(Laplace(mu, b)) = 2b².
@@ -54,5 +105,5 @@ class LaplaceMechanism(AdditiveMechanism):
     def noise_scale_func(eps, l1_sens):
         return l1_sens / eps
 
-    def generate_noise(self, size) -> np.ndarray:
-        return np.random.laplace(loc=0, scale=self.noise_scale(), size=size)
+    def generate_noise(self, size, n_releases: int | None = None) -> np.ndarray:
+        return self._rng.laplace(loc=0, scale=self.noise_scale(), size=self._release_shape(size, n_releases))
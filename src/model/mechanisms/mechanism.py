@@ -1,22 +1,55 @@
+import copy
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, List
 
 import numpy as np
 
-from definitions import TradeOffFunction, Region
+from definitions import TradeOffFunction, Region, SeedLike
 from model.diff_privacy.regions import region_from_f_dp, region_from_dp_tv_params
+from pld import PrivacyLossDistribution
+from rdp import DEFAULT_ORDERS, RenyiDP
+from tradeoff_curves import TradeOffCurve
 
 
 class Mechanism(ABC):
-    def __init__(self, eps: float, delta: float):
+    def __init__(self, eps: float, delta: float, rng: SeedLike = None):
         """
         Store eps and delta differential privacy parameters.
 
         :param eps: float
         :param delta: float
+        :param rng: SeedLike
+                Random generator of the mechanism, or seed of a new one, defaults to a freshly seeded generator.
         """
         self._eps = eps
         self._delta = delta
+        self._rng = np.random.default_rng(rng)
+
+    def rng(self) -> np.random.Generator:
+        return self._rng
+
+    def spawn(self, n: int) -> List[np.random.Generator]:
+        """
+        Spawn independent child generators, e.g. one per worker of a pool, to be given to copies of the mechanism.
+
+        :param n: int
+                Number of generators.
+
+        :return: List[np.random.Generator]
+        """
+        return self._rng.spawn(n)
+
+    def with_rng(self, rng: SeedLike) -> 'Mechanism':
+        """
+        Shallow copy of the mechanism drawing from another generator, e.g. one spawned for a worker.
+
+        :param rng: SeedLike
+
+        :return: Mechanism
+        """
+        copied = copy.copy(self)
+        copied._rng = np.random.default_rng(rng)
+        return copied
 
     @abstractmethod
     def apply(self, x: np.ndarray, *args, **kwargs) -> Any:
@@ -35,12 +68,43 @@ class Mechanism(ABC):
         """
         pass
 
+    @abstractmethod
+    def privacy_loss_distribution(self, dx: float) -> PrivacyLossDistribution:
+        """
+        Privacy loss distribution of the mechanism between two neighboring datasets of maximal sensitivity, discretized
+        on a grid of step dx, for composition.
+
+        :param dx: float
+
+        :return: PrivacyLossDistribution
+        """
+        pass
+
+    @abstractmethod
+    def renyi_dp(self, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+        """
+        Rényi differential privacy guarantees of the mechanism, for composition.
+
+        :param orders: np.ndarray
+                Orders, defaults to DEFAULT_ORDERS.
+
+        :return: RenyiDP
+        """
+        pass
+
+    def tradeoff_curve(self) -> TradeOffCurve:
+        """
+        Piecewise-linear representation of the tradeoff function, sampled if it is not already one.
+        :return: TradeOffCurve
+        """
+        return TradeOffCurve.from_function(self.tradeoff_function())
+
     def privacy_region(self) -> Region:
         """
         Ideally, define the tradeoff-function induced (exact) region.
         :return: Region
         """
-        return region_from_f_dp(self.tradeoff_function())
+        return region_from_f_dp(self.tradeoff_curve())
 
     def region_tv(self) -> Region:
         """
@@ -50,4 +114,4 @@ class Mechanism(ABC):
         return region_from_dp_tv_params(self._eps, self._delta, self.tv())
 
     def __call__(self, x: np.ndarray, *args, **kwargs) -> Any:
-        return self.apply(x)
\ No newline at end of file
+        return self.apply(x, *args, **kwargs)
\ No newline at end of file
@@ -1,8 +1,10 @@
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 import numpy as np
 
-from definitions import TradeOffFunction
+from definitions import TradeOffFunction, SeedLike
+from pld import PrivacyLossDistribution, randomized_response_pld
+from rdp import DEFAULT_ORDERS, RenyiDP, randomized_response_rdp
 from regions import tradeoff_eps_delta_dp_total_var
 from mechanism import Mechanism
 
@@ -12,7 +14,7 @@ class RandomizedResponseMech(Mechanism):
     Define the privacy region and the utility proxy of randomized response.
     """
 
-    def __init__(self, eps: float, alphabet_size: int):
+    def __init__(self, eps: float, alphabet_size: int, rng: SeedLike = None):
         """
         Instantiate the randomized response parameters.
 
@@ -21,8 +23,11 @@ class RandomizedResponseMech(Mechanism):
 
         :param alphabet_size: int
                 Size of randomized input alphabet.
+
+        :param rng: SeedLike
+                Random generator of the mechanism, or seed of a new one, defaults to a freshly seeded generator.
         """
-        super().__init__(eps, 0)
+        super().__init__(eps, 0, rng)
         self._alphabet_size = alphabet_size
         self._p_eps = 1 - RandomizedResponseMech.compute_randomized_response_proba(eps, self._alphabet_size)
         self._total_var = self._p_eps
@@ -58,16 +63,46 @@ class RandomizedResponseMech(Mechanism):
         return np.log((p + (1-p)/alphabet_size) / ((1-p)/alphabet_size))
 
     def apply(self, x: np.ndarray, *args, **kwargs) -> Any:
-        y = np.copy(x)
+        """
+        Randomize every symbol of x independently: each is kept with probability p_eps, and otherwise replaced by a
+        uniformly random symbol of {1, ..., alphabet_size}.
+
+        :param x: np.ndarray
+                Symbols to randomize.
+
+        :param args: unused
 
-        for i in range(len(x)):
-            if np.random.random() > self._p_eps:
-                y[i] = np.random.uniform(low=1, high=self._alphabet_size+1)
+        :param kwargs: unused
+
+        :return: np.ndarray
+                Randomized symbols, of the shape and dtype of x.
+        """
+        y = np.array(x, copy=True)
+        replaced = self._rng.random(y.shape) >= self._p_eps
+        y[replaced] = self._rng.integers(1, self._alphabet_size, size=np.count_nonzero(replaced), endpoint=True)
 
         return y
 
+    def apply_chunks(self, chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """
+        Randomize a stream of arrays, e.g. the chunks of a column too large to be loaded at once.
+
+        :param chunks: Iterable[np.ndarray]
+
+        :return: Iterator[np.ndarray]
+                Randomized chunks, in order.
+        """
+        for chunk in chunks:
+            yield self.apply(chunk)
+
     def tradeoff_function(self) -> TradeOffFunction:
         return tradeoff_eps_delta_dp_total_var(self._eps, 0, self._total_var)
 
+    def privacy_loss_distribution(self, dx: float) -> PrivacyLossDistribution:
+        return randomized_response_pld(self._eps, self._alphabet_size, dx)
+
+    def renyi_dp(self, orders: np.ndarray = DEFAULT_ORDERS) -> RenyiDP:
+        return randomized_response_rdp(self._eps, self._alphabet_size, orders)
+
     def tv(self) -> float:
         return self._total_var
\ No newline at end of file
@@ -1,10 +1,13 @@
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, Tuple, List, Optional
 
 import numpy as np
 
+from definitions import SeedLike
 from laplace_mechanism import LaplaceMechanism
 from sensitivities import L1Sensitivity
-from query import Query, DPQuery
+from query import Query, DPQuery, DataSource, DEFAULT_CHUNK_SIZE, iter_chunks
+
+_SYNTHETIC_DATASET_SIZE = 1000
 
 
 class Histogram(Query, L1Sensitivity):
@@ -12,36 +15,96 @@ class Histogram(Query, L1Sensitivity):
     Define  mechanism the histogram query.
     """
 
-    def __init__(self, num_bins: int):
+    def __init__(self, num_bins: int, edges: Optional[np.ndarray] = None):
         """
         Construct a histogram query with a given number of bins.
 
         :param num_bins: int
+                Number of bins, ignored if edges are given.
+
+        :param edges: Optional[np.ndarray]
+                Public, increasing bin edges. Bins are half-open, except the last one, and data outside of the edges
+                is not counted, as in np.histogram. Defaults to num_bins bins spanning the range of the data, which
+                depends on the data itself and thus cannot be released privately.
         """
-        self._num_bins = num_bins
+        self._edges = None if edges is None else np.asarray(edges, dtype=float)
+        self._num_bins = num_bins if edges is None else len(self._edges) - 1
 
     def apply(self, x: np.ndarray) -> np.ndarray:
         """
         Compute the histogram of given data.
 
         :param x: np.ndarray
-                Given data.
+                Given data, possibly memory-mapped.
 
         :return: np.ndarray
                 Histogram of the given data.
         """
-        return np.histogram(x, self._num_bins)[0]
+        if self._edges is None:
+            return np.histogram(x, self._num_bins)[0]
+        return self.apply_chunks(x)
+
+    def apply_chunks(self, data: DataSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Accumulate the histogram of data streamed by chunks, which requires public bin edges.
+
+        :param data: DataSource
+                Array (possibly memory-mapped), path of a .npy file or iterable of chunks.
+
+        :param chunk_size: int
+                Number of data points binned at once, defaults to 2^20.
+
+        :return: np.ndarray
+                Histogram of the whole data.
+        """
+        if self._edges is None:
+            raise ValueError("Streaming a histogram requires public bin edges")
+
+        counts = np.zeros(self._num_bins, dtype=np.int64)
+        for chunk in iter_chunks(data, chunk_size):
+            counts += np.bincount(self.bin_indices(chunk), minlength=self._num_bins)
+
+        return counts
+
+    def bin_indices(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Bin of every data point within the edges.
+
+        :param chunk: np.ndarray
+
+        :return: np.ndarray
+                Bin indices of the points within the edges, flattened.
+        """
+        chunk = np.ravel(chunk)
+        idx = np.searchsorted(self._edges, chunk, side='right') - 1
+        # The last bin is closed
+        idx[chunk == self._edges[-1]] = self._num_bins - 1
+        return idx[(idx >= 0) & (idx < self._num_bins)]
 
     def l1_sens(self) -> float:
         return 2.
 
 class DPHistogram(DPQuery):
 
-    def __init__(self, eps: float, num_bins: int):
-        super().__init__(eps, 0)
-        self._hist = Histogram(num_bins)
-        self._num_bins = num_bins
-        self._laplace = LaplaceMechanism(eps, self._hist.l1_sens())
+    def __init__(self, eps: float, num_bins: int, edges: Optional[np.ndarray] = None, rng: SeedLike = None):
+        """
+        Construct the query.
+
+        :param eps: float
+
+        :param num_bins: int
+                Number of bins, ignored if edges are given.
+
+        :param edges: Optional[np.ndarray]
+                Public bin edges, required to stream the data, defaults to bins spanning the range of the data.
+
+        :param rng: SeedLike
+                Random generator of the query, or seed of a new one, defaults to a freshly seeded generator.
+        """
+        super().__init__(eps, 0, rng)
+        self._hist = Histogram(int(num_bins), edges)
+        self._num_bins = num_bins if edges is None else len(edges) - 1
+        self._laplace = LaplaceMechanism(eps, self._hist.l1_sens(), self._rng)
 
     @staticmethod
     def utility_func(*args, **kwargs): # mse
@@ -55,6 +118,32 @@ class DPHistogram(DPQuery):
     def apply(self, x: np.ndarray) -> Any:
         return self._laplace(self._hist.apply(x))
 
+    def apply_chunks(self, data: DataSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Release the histogram of data streamed by chunks, e.g. a memory-mapped .npy file larger than memory. The
+        counts are accumulated exactly, and noised once.
+
+        :param data: DataSource
+                Array (possibly memory-mapped), path of a .npy file or iterable of chunks.
+
+        :param chunk_size: int
+                Number of data points binned at once, defaults to 2^20.
+
+        :return: np.ndarray
+                Private histogram.
+        """
+        return self._laplace(self._hist.apply_chunks(data, chunk_size))
+
+    def synthetic_data(self, rng: np.random.Generator) -> np.ndarray:
+        return rng.normal(size=_SYNTHETIC_DATASET_SIZE)
+
+    def apply_batch(self, x: np.ndarray, n_releases: int) -> np.ndarray:
+        return self._laplace.apply(self._hist.apply(x), n_releases)
+
+    def empirical_utility(self, x: np.ndarray, releases: np.ndarray) -> np.ndarray:
+        # Squared error summed over the bins, whose expectation is utility_func
+        return np.sum((releases - self._hist.apply(x)) ** 2, axis=-1)
+
     def privacy_region(self, *args, **kwargs):
         return self._laplace.privacy_region()
 
@@ -1,48 +1,272 @@
 import numpy as np
 
-from definitions import SLIDER_RESOLUTION_NON_INTEGER
+from definitions import SLIDER_RESOLUTION_NON_INTEGER, SeedLike
 from gaussian_mechanism import GaussianMechanism
 from sensitivities import L1Sensitivity
-from query import Query, DPQuery
-from typing import Any, Dict, Tuple, List
+from query import Query, DPQuery, DataSource, DEFAULT_CHUNK_SIZE, iter_chunks
+from typing import Any, Dict, Tuple, List, Optional
 
 
 class Mean(Query, L1Sensitivity):
 
-    def __init__(self, alphabet_diameter: float, dataset_size: int):
-        self._l1_sens = alphabet_diameter/dataset_size
+    def __init__(self,
+        alphabet_diameter: float,
+        dataset_size: int,
+        dimensions: int = 1,
+        center: Optional[np.ndarray] = None,
+        clipping: bool = True
+    ):
+        """
+        Construct the mean query of datasets of dataset_size rows in dimensions dimensions, lying in a set of L2
+        diameter alphabet_diameter.
 
-    def apply(self, x: np.ndarray) -> np.floating[Any]:
-        return np.mean(x)
+        :param alphabet_diameter: float
+
+        :param dataset_size: int
+
+        :param dimensions: int
+                Number of dimensions of the rows, defaults to 1.
+
+        :param center: Optional[np.ndarray]
+                Center of the L2 ball of diameter alphabet_diameter the rows are clipped to, which enforces the
+                sensitivity, defaults to the origin.
+
+        :param clipping: bool
+                Whether to clip the rows, defaults to True. Without clipping, the sensitivity only holds if the rows
+                are known to lie in a set of diameter alphabet_diameter.
+        """
+        self._dimensions = dimensions
+        self._radius = alphabet_diameter / 2
+        self._center = np.zeros(dimensions) if center is None else \
+            np.broadcast_to(np.asarray(center, dtype=float), (dimensions,))
+        self._clipping = clipping
+        # Replacing one row moves the mean by at most the diameter over the dataset size, in L2 norm
+        self._l2_sens = alphabet_diameter / dataset_size
+        self._l1_sens = np.sqrt(dimensions) * self._l2_sens
+
+    def apply(self, x: np.ndarray) -> np.floating[Any] | np.ndarray:
+        """
+        Compute the mean of the (clipped) rows of given data.
+
+        :param x: np.ndarray
+                Given data, of shape (n,) in one dimension or (n, dimensions), possibly memory-mapped.
+
+        :return: np.floating[Any] | np.ndarray
+                Mean, a scalar in one dimension.
+        """
+        mean = self.apply_chunks(x)
+        return mean[0] if self._dimensions == 1 else mean
+
+    def apply_chunks(self, data: DataSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Compute the mean of data streamed by chunks of rows, in a single pass.
+
+        :param data: DataSource
+                Array (possibly memory-mapped), path of a .npy file or iterable of chunks of rows.
+
+        :param chunk_size: int
+                Number of rows summed at once, defaults to 2^20.
+
+        :return: np.ndarray
+                Mean, of shape (dimensions,).
+        """
+        total = np.zeros(self._dimensions)
+        count = 0
+        for chunk in iter_chunks(data, chunk_size):
+            rows = self.clip(chunk)
+            total += rows.sum(axis=0)
+            count += len(rows)
+
+        return total / count
+
+    def group_sums(self,
+        data: DataSource,
+        keys: DataSource,
+        num_groups: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sum the (clipped) rows of every group, in a single pass over data and keys streamed by chunks.
+
+        :param data: DataSource
+                Array (possibly memory-mapped), path of a .npy file or iterable of chunks of rows.
+
+        :param keys: DataSource
+                Group of every row, in [0, num_groups), chunked like data.
+
+        :param num_groups: int
+
+        :param chunk_size: int
+                Number of rows summed at once, defaults to 2^20.
+
+        :return: Tuple[np.ndarray, np.ndarray]
+                Sums, of shape (num_groups, dimensions), and sizes of the groups.
+
+        :raises ValueError: If a key lies outside of [0, num_groups).
+        """
+        sums = np.zeros((num_groups, self._dimensions))
+        counts = np.zeros(num_groups, dtype=np.int64)
+        for chunk, chunk_keys in zip(iter_chunks(data, chunk_size), iter_chunks(keys, chunk_size)):
+            rows = self.clip(chunk)
+            chunk_keys = np.ravel(chunk_keys)
+            if len(chunk_keys) > 0 and (chunk_keys.min() < 0 or chunk_keys.max() >= num_groups):
+                raise ValueError(f"Group keys must lie in [0, num_groups), with num_groups = {num_groups}")
+            counts += np.bincount(chunk_keys, minlength=num_groups)
+            for dim in range(self._dimensions):
+                sums[:, dim] += np.bincount(chunk_keys, weights=rows[:, dim], minlength=num_groups)
+
+        return sums, counts
+
+    def clip(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Project rows onto the L2 ball of the query, unless clipping is disabled.
+
+        :param chunk: np.ndarray
+                Rows, of shape (n,) in one dimension or (n, dimensions).
+
+        :return: np.ndarray
+                Clipped rows, of shape (n, dimensions).
+        """
+        rows = np.asarray(chunk, dtype=float).reshape(-1, self._dimensions)
+        if not self._clipping:
+            return rows
+
+        offsets = rows - self._center
+        norms = np.linalg.norm(offsets, axis=1)
+        scale = np.divide(self._radius, norms, out=np.ones_like(norms), where=norms > self._radius)
+        offsets *= scale[:, np.newaxis]
+        offsets += self._center
+        return offsets
 
     def l1_sens(self) -> float:
         return self._l1_sens
 
     def l2_sens(self) -> float:
-        return self._l1_sens
+        return self._l2_sens
 
 
 class FiniteAlphabetMean(Mean):
     def __init__(self, alphabet: np.ndarray, dataset_size: int):
-        super().__init__(np.max(alphabet) - np.min(alphabet), dataset_size)
+        lower, upper = np.min(alphabet), np.max(alphabet)
+        super().__init__(upper - lower, dataset_size, center=(lower + upper) / 2)
 
 
 class DPMean(DPQuery):
 
-    def __init__(self, eps: float, delta: float, dataset_diameter: float, dataset_size: int, dimensions: int):
-        self._mean = Mean(dataset_diameter, dataset_size)
-        self._gaussian_mech = GaussianMechanism(eps, delta, self._mean.l2_sens())
-        super().__init__(eps, 0)
+    def __init__(self,
+        eps: float,
+        delta: float,
+        dataset_diameter: float,
+        dataset_size: int,
+        dimensions: int,
+        center: Optional[np.ndarray] = None,
+        clipping: bool = True,
+        rng: SeedLike = None
+    ):
+        """
+        Construct the query.
+
+        :param eps: float
+
+        :param delta: float
+
+        :param dataset_diameter: float
+                L2 diameter of the set the rows lie in.
+
+        :param dataset_size: int
+                Public number of rows, or of rows of every group for grouped releases.
+
+        :param dimensions: int
+
+        :param center: Optional[np.ndarray]
+                Center of the L2 ball the rows are clipped to, defaults to the origin.
+
+        :param clipping: bool
+                Whether to clip the rows, defaults to True. Disabling it loses the privacy guarantee on rows outside
+                of a set of diameter dataset_diameter.
+
+        :param rng: SeedLike
+                Random generator of the query, or seed of a new one, defaults to a freshly seeded generator.
+        """
+        super().__init__(eps, delta, rng)
+        self._dataset_diameter = dataset_diameter
+        self._dataset_size = int(dataset_size)
+        self._dimensions = int(dimensions)
+        self._mean = Mean(dataset_diameter, self._dataset_size, self._dimensions, center, clipping)
+        self._gaussian_mech = GaussianMechanism(eps, delta, self._mean.l2_sens(), self._rng)
 
     @staticmethod
     def utility_func(*args, **kwargs):
         return (kwargs["mean_dimensions"] *
                 (GaussianMechanism.noise_scale_func(kwargs["mean_eps"], kwargs["mean_delta"],
-                 kwargs["mean_dataset_diameter"]/kwargs["mean_dataset_size"])))
+                 kwargs["mean_dataset_diameter"]/kwargs["mean_dataset_size"]) ** 2))
 
     def apply(self, x: np.ndarray) -> Any:
         return self._gaussian_mech(np.array(self._mean.apply(x)))
 
+    def synthetic_data(self, rng: np.random.Generator) -> np.ndarray:
+        # Uniform in the largest cube of the given diameter
+        half_side = self._dataset_diameter / (2 * np.sqrt(self._dimensions))
+        return rng.uniform(-half_side, half_side, size=(self._dataset_size, self._dimensions))
+
+    def apply_batch(self, x: np.ndarray, n_releases: int) -> np.ndarray:
+        return self._gaussian_mech.apply(np.array(self._mean.apply(x)), n_releases)
+
+    def empirical_utility(self, x: np.ndarray, releases: np.ndarray) -> np.ndarray:
+        # Squared error summed over the dimensions, whose expectation is utility_func
+        errors = np.reshape(releases - self._mean.apply(x), (len(releases), -1))
+        return np.sum(errors ** 2, axis=1)
+
+    def apply_chunks(self, data: DataSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Release the mean of data streamed by chunks of rows, e.g. a memory-mapped .npy file larger than memory.
+
+        :param data: DataSource
+                Array (possibly memory-mapped), path of a .npy file or iterable of chunks of rows.
+
+        :param chunk_size: int
+                Number of rows summed at once, defaults to 2^20.
+
+        :return: np.ndarray
+                Private mean, of shape (dimensions,).
+        """
+        return self._gaussian_mech(self._mean.apply_chunks(data, chunk_size))
+
+    def apply_groups(self,
+        data: DataSource,
+        keys: DataSource,
+        num_groups: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> np.ndarray:
+        """
+        Release the means of many groups of rows at once, in a single pass over the data.
+
+        The group of every row, hence the size n_g of every group, is considered public. Groups are disjoint, so that
+        every mean is noised for its own sensitivity diameter / n_g, and the whole release is (eps, delta)-DP by
+        parallel composition.
+
+        :param data: DataSource
+                Array (possibly memory-mapped), path of a .npy file or iterable of chunks of rows.
+
+        :param keys: DataSource
+                Group of every row, in [0, num_groups), chunked like data.
+
+        :param num_groups: int
+
+        :param chunk_size: int
+                Number of rows summed at once, defaults to 2^20.
+
+        :return: np.ndarray
+                Private means, of shape (num_groups, dimensions), NaN for empty groups.
+        """
+        sums, counts = self._mean.group_sums(data, keys, num_groups, chunk_size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = sums / counts[:, np.newaxis]
+            sigmas = GaussianMechanism.noise_scale_func(self._eps, self._delta, self._dataset_diameter / counts)
+
+        means += self._rng.normal(size=means.shape) * sigmas[:, np.newaxis]
+        return means
+
     @staticmethod
     def params_to_slider_labels() -> Dict[str, str]:
         return {
@@ -1,10 +1,15 @@
 import numpy as np
 
-from regions import region_from_dp_params
+from definitions import SeedLike
 from sensitivities import L1Sensitivity
+from exponential_mechanism import ExponentialMechanism
 from query import Query, DPQuery
 from typing import Any, Dict, Tuple, List
 
+# Changing one data point changes #{x > c} - #{x < c} by at most 2
+_SCORE_SENSITIVITY = 2
+_SYNTHETIC_DATASET_SIZE = 1000
+
 
 class Median(Query, L1Sensitivity):
 
@@ -29,21 +34,73 @@ class DPMedian(DPQuery):
     Represent median queries over datasets included with elements in {1, ..., alphabet_size}.
     """
 
-    def __init__(self, eps: float, alphabet_size: float, t: float):
+    def __init__(self, eps: float, alphabet_size: float, t: float, rng: SeedLike = None):
+        super().__init__(eps, 0, rng)
+        self._alphabet_size = alphabet_size
+        self._t = t
+        self._exp_mech = ExponentialMechanism(eps,
+                                              DPMedian.score,
+                                              _SCORE_SENSITIVITY,
+                                              np.arange(1, int(alphabet_size) + 1),
+                                              rng=self._rng)
 
-        def score_func(data: np.ndarray) -> np.ndarray:
-            return np.exp(-(eps/4) * np.abs(np.sum(np.sign(data-np.arange(1, alphabet_size+1)))))
+    @staticmethod
+    def score(candidates: np.ndarray, sorted_x: np.ndarray) -> np.ndarray:
+        """
+        Score symbols c by -|#{x > c} - #{x < c}|, counted by binary search in the sorted data, in O(m log n) rather
+        than O(n m).
 
-        self._exp_q = score_func
-        self._alphabet_size = alphabet_size
-        super().__init__(eps, 0)
+        :param candidates: np.ndarray
+                Symbols to score.
 
+        :param sorted_x: np.ndarray
+                Sorted one-dimensional data.
+
+        :return: np.ndarray
+                Scores of the symbols.
+        """
+        below = np.searchsorted(sorted_x, candidates, side='left')
+        above = len(sorted_x) - np.searchsorted(sorted_x, candidates, side='right')
+        return -np.abs(above - below)
 
     def apply(self, x: np.ndarray) -> Any:
-        return np.random.choice(x, 1, p=self._exp_q(x)/self._exp_q(np.arange(1, self._alphabet_size+1)).sum())[0]
+        """
+        Release a symbol close to the median through the exponential mechanism, sampled in log space.
+
+        :param x: np.ndarray
+                Data with elements in {1, ..., alphabet_size}.
+
+        :return: int
+                Private median.
+        """
+        return self._exp_mech(np.sort(np.asarray(x).ravel()))
+
+    def synthetic_data(self, rng: np.random.Generator) -> np.ndarray:
+        return rng.integers(1, int(self._alphabet_size), size=_SYNTHETIC_DATASET_SIZE, endpoint=True)
+
+    def apply_batch(self, x: np.ndarray, n_releases: int) -> np.ndarray:
+        return self._exp_mech(np.sort(np.asarray(x).ravel()), n_releases=n_releases)
+
+    def empirical_utility(self, x: np.ndarray, releases: np.ndarray) -> np.ndarray:
+        """
+        Whether every release is at least t positions off the middle of the data, so that the mean utility estimates
+        the probability bounded by utility_func. Positions of symbols shared by several data points span a range.
+
+        :param x: np.ndarray
+
+        :param releases: np.ndarray
+
+        :return: np.ndarray
+        """
+        sorted_x = np.sort(np.asarray(x).ravel())
+        first = np.searchsorted(sorted_x, releases, side='left')
+        last = np.searchsorted(sorted_x, releases, side='right')
+        middle = len(sorted_x) / 2
+        distance = np.maximum(0, np.maximum(first - middle, middle - last))
+        return (distance >= self._t).astype(float)
 
     def privacy_region(self, *args, **kwargs):
-        return region_from_dp_params(self._eps, 0)
+        return self._exp_mech.privacy_region()
 
     @staticmethod
     def utility_func(*args, **kwargs):
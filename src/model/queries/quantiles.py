@@ -0,0 +1,77 @@
+import numpy as np
+
+from definitions import SeedLike
+from exponential_mechanism import gumbel_argmax
+
+
+def dp_quantiles(
+        x: np.ndarray,
+        qs: float | np.ndarray,
+        eps: float,
+        lower: float,
+        upper: float,
+        rng: SeedLike = None,
+        presorted: bool = False
+) -> np.ndarray:
+    """
+    Differentially private quantiles through the exponential mechanism over the intervals between sorted data points.
+
+    The data, clipped to [lower, upper], splits the range into n + 1 intervals. The interval of rank i is selected
+    with probability proportional to its width times exp(-eps' |i - q n| / 2), since changing one data point moves
+    every rank by at most 1, and a uniform point of the selected interval is released. Sorting dominates the cost, in
+    O(n log n), and is shared by all the requested quantiles.
+
+    The budget is split evenly across the quantiles (eps' = eps / len(qs)), so that the whole call is (eps, 0)-DP.
+
+    :param x: np.ndarray
+            Data, of any shape.
+
+    :param qs: float | np.ndarray
+            Quantile(s) to release, in [0, 1].
+
+    :param eps: float
+            Total privacy budget.
+
+    :param lower: float
+            Public lower bound of the data.
+
+    :param upper: float
+            Public upper bound of the data.
+
+    :param rng: SeedLike
+            Random generator, or seed of a new one, defaults to a freshly seeded generator.
+
+    :param presorted: bool
+            Whether x is already sorted and one-dimensional, which skips sorting, defaults to False.
+
+    :return: np.ndarray
+            Private quantiles, of the shape of qs.
+    """
+    assert lower < upper
+
+    rng = np.random.default_rng(rng)
+    qs = np.asarray(qs, dtype=float)
+    eps_q = eps / max(qs.size, 1)
+
+    sorted_x = np.asarray(x, dtype=float).ravel()
+    if not presorted:
+        sorted_x = np.sort(sorted_x)
+    n = sorted_x.size
+
+    bounds = np.empty(n + 2)
+    bounds[0], bounds[-1] = lower, upper
+    np.clip(sorted_x, lower, upper, out=bounds[1:-1])
+
+    with np.errstate(divide='ignore'):
+        log_widths = np.log(np.diff(bounds))
+    ranks = np.arange(n + 1, dtype=float)
+
+    released = np.empty(qs.size)
+    for idx, q in enumerate(qs.ravel()):
+        log_weights = np.abs(ranks - q * n)
+        log_weights *= -eps_q / 2
+        log_weights += log_widths
+        interval = gumbel_argmax(log_weights, rng)
+        released[idx] = rng.uniform(bounds[interval], bounds[interval + 1])
+
+    return released.reshape(qs.shape)
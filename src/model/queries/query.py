@@ -1,7 +1,41 @@
+import os
+
 import numpy as np
 
 from abc import ABC, abstractmethod
-from typing import Callable, Any, Dict, Tuple, List
+from typing import Callable, Any, Dict, Tuple, List, Iterable, Iterator
+
+from definitions import SeedLike
+
+DEFAULT_CHUNK_SIZE = 2 ** 20
+
+DataSource = np.ndarray | str | os.PathLike | Iterable[np.ndarray]
+
+
+def iter_chunks(data: DataSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """
+    Stream data by chunks along its first axis, so that it never has to be held in memory at once.
+
+    :param data: DataSource
+            Array (possibly memory-mapped), path of a .npy file, which is memory-mapped, or iterable of chunks, which
+            are yielded as is.
+
+    :param chunk_size: int
+            Number of rows of the chunks of arrays and files, defaults to 2^20.
+
+    :return: Iterator[np.ndarray]
+    """
+    if isinstance(data, (str, os.PathLike)):
+        data = np.load(data, mmap_mode='r')
+
+    if isinstance(data, np.ndarray):
+        if data.ndim == 0:
+            data = data.reshape(1)
+        for start in range(0, len(data), chunk_size):
+            yield np.asarray(data[start:start + chunk_size])
+    else:
+        for chunk in data:
+            yield np.asarray(chunk)
 
 
 class Query(ABC, Callable[[np.ndarray], Any]):
@@ -14,10 +48,120 @@ class Query(ABC, Callable[[np.ndarray], Any]):
 
 
 class DPQuery(Query):
-    def __init__(self, eps: float, delta: float):
+    def __init__(self, eps: float, delta: float, rng: SeedLike = None):
+        """
+        Store eps and delta differential privacy parameters, and the random generator shared with the mechanisms of
+        the query.
+
+        :param eps: float
+
+        :param delta: float
+
+        :param rng: SeedLike
+                Random generator of the query, or seed of a new one, defaults to a freshly seeded generator.
+        """
         self._eps = eps
         self._delta = delta
+        self._rng = np.random.default_rng(rng)
+
+    def rng(self) -> np.random.Generator:
+        return self._rng
+
+    def spawn(self, n: int) -> List[np.random.Generator]:
+        """
+        Spawn independent child generators, e.g. one per worker of a pool, to be given to copies of the query.
+
+        :param n: int
+                Number of generators.
+
+        :return: List[np.random.Generator]
+        """
+        return self._rng.spawn(n)
+
+    @abstractmethod
+    def synthetic_data(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        Dataset consistent with the parameters of the query, on which its utility is simulated.
+
+        :param rng: np.random.Generator
+
+        :return: np.ndarray
+        """
+        pass
+
+    @abstractmethod
+    def empirical_utility(self, x: np.ndarray, releases: np.ndarray) -> np.ndarray:
+        """
+        Utility of every release of the query on given data, in the sense of utility_func and utility_label.
+
+        :param x: np.ndarray
+                Given data.
+
+        :param releases: np.ndarray
+                Releases, stacked along the leading axis.
+
+        :return: np.ndarray
+                Utility of every release.
+        """
+        pass
+
+    def apply_batch(self, x: np.ndarray, n_releases: int) -> np.ndarray:
+        """
+        Release the query independently many times on the same data.
+
+        :param x: np.ndarray
+                Given data.
+
+        :param n_releases: int
+
+        :return: np.ndarray
+                Releases, stacked along a new leading axis.
+        """
+        return np.stack([np.asarray(self.apply(x)) for _ in range(n_releases)])
+
+    @classmethod
+    def simulate_utility(cls,
+        construct_args: Dict[str, Any],
+        main_param: str,
+        x_vals: np.ndarray,
+        trials: int,
+        rng: SeedLike = None
+    ) -> np.ndarray:
+        """
+        Estimate the utility of the query by running it on synthetic data, for every value of a swept parameter.
+
+        Every point of the sweep is simulated on the same synthetic data (as long as it is consistent with the
+        parameters), so that the curves are not blurred by the variability of the data, and the trials of each point
+        are released in one batch.
+
+        :param construct_args: Dict[str, Any]
+                Actual (not slider) values of the parameters of the query.
+
+        :param main_param: str
+                Swept parameter, whose value in construct_args is ignored.
+
+        :param x_vals: np.ndarray
+                Values of the swept parameter.
+
+        :param trials: int
+                Number of releases per value.
+
+        :param rng: SeedLike
+                Random generator of the simulation, or seed of a new one, defaults to a freshly seeded generator.
+
+        :return: np.ndarray
+                Utilities, of shape (len(x_vals), trials).
+        """
+        rng = np.random.default_rng(rng)
+        data_seed = rng.integers(2 ** 63)
+
+        utilities = np.empty((len(x_vals), trials))
+        for utility, x_val, query_rng in zip(utilities, x_vals, rng.spawn(len(x_vals))):
+            query = cls(**{**construct_args, main_param: x_val}, rng=query_rng)
+            x = query.synthetic_data(np.random.default_rng(data_seed))
+            utility[:] = query.empirical_utility(x, query.apply_batch(x, trials))
 
+        return utilities
 
     @abstractmethod
     def privacy_region(self, *args, **kwargs):
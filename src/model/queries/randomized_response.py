@@ -2,21 +2,35 @@ from typing import Any, Dict, Tuple, List
 
 import numpy as np
 
-from definitions import TradeOffFunction
+from definitions import TradeOffFunction, SeedLike
 from query import DPQuery
 from regions import tradeoff_eps_delta_dp_total_var
 from mechanism import Mechanism
 from mechanisms.randomized_response_mechanism import RandomizedResponseMech
 
+_SYNTHETIC_DATASET_SIZE = 1000
+
 
 class RandomizedResponse(DPQuery):
-    def __init__(self, eps: float, alphabet_size: int):
-        super().__init__(eps, 0)
-        self._rr = RandomizedResponseMech(eps, alphabet_size)
+    def __init__(self, eps: float, alphabet_size: int, rng: SeedLike = None):
+        super().__init__(eps, 0, rng)
+        self._alphabet_size = int(alphabet_size)
+        self._rr = RandomizedResponseMech(eps, self._alphabet_size, self._rng)
 
     def apply(self, x: np.ndarray) -> Any:
         return self._rr(x)
 
+    def synthetic_data(self, rng: np.random.Generator) -> np.ndarray:
+        return rng.integers(1, self._alphabet_size, size=_SYNTHETIC_DATASET_SIZE, endpoint=True)
+
+    def apply_batch(self, x: np.ndarray, n_releases: int) -> np.ndarray:
+        return self._rr(np.broadcast_to(x, (n_releases,) + np.shape(x)))
+
+    def empirical_utility(self, x: np.ndarray, releases: np.ndarray) -> np.ndarray:
+        # A uniform choice changes a symbol with probability (m - 1) / m
+        changed = np.mean(releases.reshape(len(releases), -1) != np.ravel(x), axis=1)
+        return changed * self._alphabet_size / (self._alphabet_size - 1)
+
     def privacy_region(self, *args, **kwargs):
         return self._rr.privacy_region()
 